@@ -0,0 +1,23 @@
+import os
+import shutil
+
+
+# Each worker writes its Prometheus samples in this directory, aggregated by the /metrics view.
+# It must be set before prometheus_client is imported, in the master, then inherited by the workers.
+if os.getenv("METRICS_TOKEN"):
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus")
+
+
+def on_starting(server):
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        # the samples of the workers of a previous run would be added to those of the new ones
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
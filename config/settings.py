@@ -50,6 +50,7 @@ DJANGO_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 THIRD_PARTY_APPS = [
@@ -70,11 +71,15 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "utils.queries.QueryFingerprintMiddleware",
+    "utils.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "utils.edge_cache.EdgeCacheMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "utils.timing.ServerTimingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
@@ -107,7 +112,8 @@ FORM_RENDERER = "django.forms.renderers.TemplatesSetting"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # times the template rendering of the requests sampled by ServerTimingMiddleware
+        "BACKEND": "utils.timing.TimedDjangoTemplates",
         "DIRS": [
             os.path.join(BASE_DIR, "dsfr/templates"),
             os.path.join(BASE_DIR, "templates"),
@@ -196,9 +202,16 @@ AWS_S3_STORAGE_BUCKET_REGION = os.getenv("S3_BUCKET_REGION", "fr")
 # ------------------------------------------------------------------------------
 
 # See: https://docs.djangoproject.com/en/dev/ref/settings/#media-url
-MEDIA_URL = f"https://{AWS_S3_ENDPOINT_URL}/"  # noqa
+# path-style URL of the bucket, the base of the unsigned URLs of the public media
+MEDIA_URL = f"{AWS_S3_ENDPOINT_URL.rstrip('/')}/{AWS_STORAGE_BUCKET_NAME}/"
+# files under these prefixes (e.g. "images/,synthesis/") get unsigned URLs: the bucket must make them publicly
+# readable. The others get signed URLs (AWS_QUERYSTRING_EXPIRE, 1 hour by default)
+MEDIA_PUBLIC_PREFIXES = tuple(prefix for prefix in os.getenv("MEDIA_PUBLIC_PREFIXES", "").split(",") if prefix)
+# signed URLs are reused until this many seconds before they expire, which must cover the caches of the
+# pages holding them (FRAGMENT_CACHE_TIMEOUT, PAGE_CACHE_TIMEOUT and EDGE_CACHE_MAX_AGE)
+STORAGE_URL_MIN_VALIDITY = int(os.getenv("STORAGE_URL_MIN_VALIDITY", "1800"))
 
-DEFAULT_FILE_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
+DEFAULT_FILE_STORAGE = "utils.storage.TimedS3Storage"
 
 # Django Sass
 SASS_PROCESSOR_ROOT = os.path.join(BASE_DIR, "static")
@@ -238,6 +251,98 @@ BREVO_SMTP_URL = os.path.join(BREVO_URL, "smtp/email")
 
 BREVO_API_KEY = os.getenv("BREVO_API_KEY", "set-brevo-api-key")
 
+# HTTP client, delays in seconds
+BREVO_TIMEOUT = float(os.getenv("BREVO_TIMEOUT", "10"))
+BREVO_CONNECT_TIMEOUT = float(os.getenv("BREVO_CONNECT_TIMEOUT", "3"))
+BREVO_MAX_RETRIES = int(os.getenv("BREVO_MAX_RETRIES", "2"))
+BREVO_MAX_CONNECTIONS = int(os.getenv("BREVO_MAX_CONNECTIONS", "10"))
+BREVO_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("BREVO_CIRCUIT_FAILURE_THRESHOLD", "5"))
+BREVO_CIRCUIT_RESET_TIMEOUT = int(os.getenv("BREVO_CIRCUIT_RESET_TIMEOUT", "30"))
+
 BREVO_PARTICIPATION_RECEIVED_TEMPLATE = 40
 BREVO_PARTICIPATION_ACCEPTED_TEMPLATE = 41
 BREVO_PARTICIPATION_DECLINE_TEMPLATE = 42
+
+# Maximum number of messageVersions in a single Brevo call
+BREVO_MAX_MESSAGE_VERSIONS = 1000
+
+# Outbox worker (python manage.py send_queued_emails), delays in seconds
+BREVO_OUTBOX_MAX_ATTEMPTS = int(os.getenv("BREVO_OUTBOX_MAX_ATTEMPTS", "8"))
+BREVO_OUTBOX_RETRY_DELAY = int(os.getenv("BREVO_OUTBOX_RETRY_DELAY", "60"))
+BREVO_OUTBOX_MAX_RETRY_DELAY = int(os.getenv("BREVO_OUTBOX_MAX_RETRY_DELAY", "3600"))
+BREVO_OUTBOX_LEASE = int(os.getenv("BREVO_OUTBOX_LEASE", "300"))
+
+# Export worker (python manage.py process_event_exports)
+# a running export not finished after this delay (seconds) was abandoned by a stopped worker
+EXPORT_RUNNING_TIMEOUT = int(os.getenv("EXPORT_RUNNING_TIMEOUT", "1800"))
+
+# Result counts of the public lists
+# ---------------------------------------
+# cached counts expire after this delay (seconds), which bounds the drift of the date based filters
+LIST_COUNT_CACHE_TIMEOUT = int(os.getenv("LIST_COUNT_CACHE_TIMEOUT", "300"))
+# above this planner estimate, the estimate is displayed instead of running an exact COUNT(*)
+LIST_COUNT_ESTIMATE_THRESHOLD = int(os.getenv("LIST_COUNT_ESTIMATE_THRESHOLD", "10000"))
+
+# Request timings (utils.timing.ServerTimingMiddleware)
+# ---------------------------------------
+# share of the requests timed and logged, those of staff users are always timed
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", "0"))
+
+# Prometheus metrics, scraped on /metrics with an "Authorization: Bearer <METRICS_TOKEN>" header
+# ---------------------------------------
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# the email and export workers of the Procfile run in their own containers: when set, each one serves its
+# metrics over HTTP on this port (without the token, to be reached from the private network only)
+METRICS_WORKER_PORT = int(os.getenv("METRICS_WORKER_PORT", "0"))
+
+# SQL fingerprints (utils.queries.QueryFingerprintMiddleware), see python manage.py top_queries
+# ---------------------------------------
+# share of the requests whose queries are recorded
+SQL_FINGERPRINT_SAMPLE_RATE = float(os.getenv("SQL_FINGERPRINT_SAMPLE_RATE", "0"))
+# delay in seconds between two writes of the fingerprints recorded by a process
+SQL_FINGERPRINT_FLUSH_INTERVAL = int(os.getenv("SQL_FINGERPRINT_FLUSH_INTERVAL", "60"))
+
+# Cached fragments (utils.templatetags.fragment_cache), in seconds
+# ---------------------------------------
+# the event cards hold signed S3 image URLs: keep it well below their remaining validity (STORAGE_URL_MIN_VALIDITY)
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv("FRAGMENT_CACHE_TIMEOUT", "600"))
+# the ids of the events organized by each user are also invalidated when the organizers change, but only in the
+# containers sharing the default cache (CACHE_LOCATION): the others keep granting a removed organizer for this long
+ORGANIZED_EVENTS_CACHE_TIMEOUT = int(os.getenv("ORGANIZED_EVENTS_CACHE_TIMEOUT", "60"))
+
+# Caches
+# ---------------------------------------
+# on the local disk, so that the gunicorn workers share the cached data and its generations (utils.cache)
+CACHE_LOCATION = os.getenv("CACHE_LOCATION", "/tmp/cnr_orga_cache")
+# entries of each cache, the oldest third is culled beyond
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(CACHE_LOCATION, "default"),
+        "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES},
+    },
+    # pages served to anonymous visitors (utils.page_cache)
+    "pages": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(CACHE_LOCATION, "pages"),
+        "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES},
+    },
+    # generations of the cached data sets (utils.cache): a few keys, never culled with the cached data
+    "generations": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(CACHE_LOCATION, "generations"),
+    },
+}
+# seconds (0 disables the page cache), pages are also invalidated by the changes of their data
+PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", "600"))
+# the "upcoming" event list is cached by time slots of this length (seconds)
+PAGE_CACHE_UPCOMING_BUCKET = int(os.getenv("PAGE_CACHE_UPCOMING_BUCKET", "300"))
+
+# Edge cache (CDN, Varnish) in front of the public pages, see utils.edge_cache
+EDGE_CACHE_MAX_AGE = int(os.getenv("EDGE_CACHE_MAX_AGE", "300"))
+# endpoint receiving the purge requests, with the surrogate keys in EDGE_PURGE_HEADER (empty disables purging)
+EDGE_PURGE_URL = os.getenv("EDGE_PURGE_URL", "")
+EDGE_PURGE_METHOD = os.getenv("EDGE_PURGE_METHOD", "PURGE")
+EDGE_PURGE_HEADER = os.getenv("EDGE_PURGE_HEADER", "Surrogate-Key")
+EDGE_PURGE_TIMEOUT = 2
@@ -4,3 +4,10 @@ from dotenv import load_dotenv
 load_dotenv(".env.test")
 
 from config.settings import *  # noqa: F401, E402, F403
+
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "default"},
+    "pages": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "pages"},
+    "generations": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "generations"},
+}
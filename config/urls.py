@@ -18,12 +18,15 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from utils.views import metrics
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("signup.urls")),
     path("event/", include("event.urls")),
     path("accounts/", include("django.contrib.auth.urls")),
+    path("metrics", metrics, name="metrics"),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 if settings.DEBUG and "debug_toolbar" in settings.INSTALLED_APPS:
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from event.models import Booking, Contribution, Event
+from event.models import Booking, Contribution, Event, EventExport
+from event.search import search_events
 
 
 @admin.register(Event)
@@ -9,6 +10,13 @@ class EventAdmin(admin.ModelAdmin):
 
     search_fields = ("subject",)
 
+    def get_search_results(self, request, queryset, search_term):
+        # trigram search over several fields instead of a sequential ILIKE scan on the subject
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return search_events(queryset, search_term), False
+
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
@@ -19,3 +27,9 @@ class BookingAdmin(admin.ModelAdmin):
 class ContributionAdmin(admin.ModelAdmin):
     list_display = ["pk", "kind", "title", "public", "event"]
     search_fields = ("title",)
+
+
+@admin.register(EventExport)
+class EventExportAdmin(admin.ModelAdmin):
+    list_display = ["pk", "event", "status", "progress", "created_on", "finished_on"]
+    list_filter = ["status"]
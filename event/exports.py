@@ -0,0 +1,251 @@
+import csv
+import hashlib
+import io
+import json
+import logging
+import tempfile
+import zipfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.aggregates import StringAgg
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Count, Max, Value
+from django.db.models.functions import MD5, Concat
+from django.utils import timezone
+from django.utils.text import slugify
+from taggit.models import TaggedItem
+
+from event.models import Booking, Contribution, ContributionStatus, EventExport
+
+
+logger = logging.getLogger(__name__)
+
+# bump when the archive content changes, so that cached archives are not reused
+EXPORT_FORMAT_VERSION = 1
+CHUNK_SIZE = 2000
+
+PARTICIPANT_HEADER = ["Prénom", "Nom", "Email", "Aide", "Commentaire", "État"]
+CONTRIBUTION_HEADER = ["Id", "Nature", "Titre", "Description", "Publique", "Étiquettes", "Statut", "Statut depuis le"]
+STATUS_HISTORY_HEADER = ["Id contribution", "Statut", "Date"]
+
+
+# booking columns of participants.csv, also digested by get_event_fingerprint
+PARTICIPANT_FIELDS = [
+    "participant__first_name",
+    "participant__last_name",
+    "participant__email",
+    "offer_help",
+    "comment",
+    "confirmed_on",
+    "cancelled_on",
+]
+
+
+def get_participant_rows(event):
+    """CSV rows of the event participants, read through a server-side cursor with their participant joined"""
+    bookings = Booking.objects.filter(event=event).order_by("pk").values_list(*PARTICIPANT_FIELDS)
+    for first_name, last_name, email, offer_help, comment, confirmed_on, cancelled_on in bookings.iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        if confirmed_on:
+            status = f"Confirmée le {confirmed_on}"
+        elif cancelled_on:
+            status = f"Déclinée le {cancelled_on}"
+        else:
+            status = "En attente"
+
+        yield [
+            first_name,
+            last_name,
+            email,
+            "oui" if offer_help else "non",
+            (comment or "").replace('"', "''"),
+            status,
+        ]
+
+
+def get_event_fingerprint(event):
+    """
+    Cheap digest of everything the export archive contains, computed from a few aggregates.
+    Two exports of an event with the same fingerprint have the same content.
+    """
+    contributions = Contribution.objects.filter(event=event)
+    parts = [
+        EXPORT_FORMAT_VERSION,
+        event.pk,
+        event.updated_at,
+        # the participants may edit their profile and their booking: their rows are digested by the database
+        Booking.objects.filter(event=event).aggregate(
+            count=Count("id"),
+            participants=MD5(
+                StringAgg(
+                    Concat(*[part for field in PARTICIPANT_FIELDS for part in (field, Value("\x1f"))]),
+                    delimiter="\x1e",
+                    ordering="id",
+                )
+            ),
+        ),
+        # updated_at also moves with the tags and statuses of the contributions
+        contributions.aggregate(count=Count("id"), last_id=Max("id"), updated=Max("updated_at")),
+        ContributionStatus.objects.filter(contribution__event=event).aggregate(count=Count("id"), last_id=Max("id")),
+        TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Contribution),
+            object_id__in=contributions.values("pk"),
+        ).aggregate(count=Count("id"), last_id=Max("id")),
+    ]
+    return hashlib.sha256(json.dumps(parts, default=str, sort_keys=True).encode()).hexdigest()
+
+
+def get_abandoned_exports():
+    """Exports still running after EXPORT_RUNNING_TIMEOUT: their worker stopped before finishing them"""
+    lease_start = timezone.now() - timedelta(seconds=settings.EXPORT_RUNNING_TIMEOUT)
+    return EventExport.objects.filter(status=EventExport.Status.RUNNING, started_on__lt=lease_start)
+
+
+def request_export(event, user):
+    """Return the export of the event in its current state, creating a new job only when needed"""
+    fingerprint = get_event_fingerprint(event)
+    export = (
+        EventExport.objects.filter(event=event, fingerprint=fingerprint)
+        .exclude(status=EventExport.Status.FAILED)
+        .exclude(pk__in=get_abandoned_exports().values("pk"))
+        .order_by("-pk")
+        .first()
+    )
+    if export is None:
+        export = EventExport.objects.create(event=event, requested_by=user, fingerprint=fingerprint)
+    return export
+
+
+def write_csv(archive, name, header, rows):
+    with archive.open(name, "w") as member, io.TextIOWrapper(member, encoding="utf-8", newline="") as text:
+        writer = csv.writer(text, quoting=csv.QUOTE_NONNUMERIC, escapechar="\\", quotechar='"')
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def get_status_history(event, current_statuses):
+    statuses = (
+        ContributionStatus.objects.filter(contribution__event=event)
+        .order_by("contribution_id", "pk")
+        .values_list("contribution_id", "status", "change_on")
+    )
+    labels = dict(ContributionStatus.Status.choices)
+    for contribution_id, status, change_on in statuses.iterator(chunk_size=CHUNK_SIZE):
+        current_statuses[contribution_id] = (labels.get(status, status), change_on)
+        yield [contribution_id, labels.get(status, status), change_on]
+
+
+def get_contributions(event, current_statuses):
+    kinds = dict(Contribution.Kind.choices)
+    contributions = Contribution.objects.filter(event=event).order_by("pk").prefetch_related("tags")
+    for contribution in contributions.iterator(chunk_size=CHUNK_SIZE):
+        status, status_on = current_statuses.get(contribution.pk, ("", ""))
+        yield {
+            "id": contribution.pk,
+            "kind": kinds.get(contribution.kind, contribution.kind),
+            "title": contribution.title,
+            "description": contribution.description,
+            "public": contribution.public,
+            "tags": sorted(tag.name for tag in contribution.tags.all()),
+            "status": status,
+            "status_on": status_on,
+        }
+
+
+def get_contribution_rows(event, current_statuses):
+    for contribution in get_contributions(event, current_statuses):
+        yield [
+            contribution["id"],
+            contribution["kind"],
+            contribution["title"],
+            contribution["description"],
+            "oui" if contribution["public"] else "non",
+            ", ".join(contribution["tags"]),
+            contribution["status"],
+            contribution["status_on"],
+        ]
+
+
+def write_jsonl(archive, name, records):
+    with archive.open(name, "w") as member, io.TextIOWrapper(member, encoding="utf-8") as text:
+        for record in records:
+            text.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+
+
+def set_progress(export, progress):
+    export.progress = progress
+    EventExport.objects.filter(pk=export.pk).update(progress=progress)
+
+
+def build_export(export):
+    """Write the event data as a zip archive into the configured file storage"""
+    event = export.event
+    # latest status of each contribution, filled while writing the status history
+    current_statuses = {}
+    with tempfile.TemporaryFile() as tmp:
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as archive:
+            write_csv(archive, "participants.csv", PARTICIPANT_HEADER, get_participant_rows(event))
+            set_progress(export, 25)
+
+            write_csv(
+                archive, "historique_statuts.csv", STATUS_HISTORY_HEADER, get_status_history(event, current_statuses)
+            )
+            set_progress(export, 50)
+
+            write_csv(
+                archive, "contributions.csv", CONTRIBUTION_HEADER, get_contribution_rows(event, current_statuses)
+            )
+            set_progress(export, 75)
+
+            write_jsonl(archive, "contributions.jsonl", get_contributions(event, current_statuses))
+            set_progress(export, 90)
+
+        tmp.seek(0)
+        export.file.save(f"export-{slugify(event.subject)}-{export.pk}.zip", File(tmp), save=False)
+
+    export.status = EventExport.Status.DONE
+    export.progress = 100
+    export.finished_on = timezone.now()
+    export.save(update_fields=["file", "status", "progress", "finished_on"])
+
+
+def claim_export():
+    with transaction.atomic():
+        # failed rather than claimed again: a job killing its worker would be retried forever
+        get_abandoned_exports().update(
+            status=EventExport.Status.FAILED,
+            error="Abandonné par le worker d'export",
+            finished_on=timezone.now(),
+        )
+        export = (
+            EventExport.objects.select_for_update(skip_locked=True)
+            .filter(status=EventExport.Status.PENDING)
+            .order_by("pk")
+            .first()
+        )
+        if export is not None:
+            export.status = EventExport.Status.RUNNING
+            export.started_on = timezone.now()
+            export.save(update_fields=["status", "started_on"])
+    return export
+
+
+def process_pending_export():
+    """Build the oldest pending export, return it (or None when there is nothing to do)"""
+    export = claim_export()
+    if export is None:
+        return None
+
+    try:
+        build_export(export)
+    except Exception as exc:  # the job must be marked as failed whatever happened
+        logger.exception("Export %s failed", export.pk)
+        export.status = EventExport.Status.FAILED
+        export.error = f"{exc.__class__.__name__}: {exc}"
+        export.finished_on = timezone.now()
+        export.save(update_fields=["status", "error", "finished_on"])
+    return export
@@ -0,0 +1,93 @@
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Count
+
+from event.models import Contribution, ContributionTagFacet, Event
+from utils.cache import GenerationCache
+
+
+TagFacet = namedtuple("TagFacet", ["slug", "name", "counts"])
+
+
+def refresh_tag_facets(tag_ids=None):
+    """Recount the facets of the given tags (of every tag when None) with one aggregate query"""
+    contributions = Contribution.objects.filter(public=True, event__pub_status=Event.PubStatus.PUB)
+    facets = ContributionTagFacet.objects.all()
+    if tag_ids is not None:
+        tag_ids = set(tag_ids)
+        if not tag_ids:
+            return
+        contributions = contributions.filter(tags__id__in=tag_ids)
+        facets = facets.filter(tag_id__in=tag_ids)
+    else:
+        contributions = contributions.filter(tags__isnull=False)
+
+    rows = contributions.values("tags__id", "tags__slug", "tags__name", "event__theme", "event__scale").annotate(
+        count=Count("pk")
+    )
+    # sorted by key, so that concurrent refreshes lock the rows in the same order
+    counted = {
+        (row["tags__id"], row["event__theme"], row["event__scale"]): row
+        for row in sorted(rows, key=lambda row: (row["tags__id"], row["event__theme"], row["event__scale"]))
+    }
+    stale = [pk for pk, *key in facets.values_list("pk", "tag_id", "theme", "scale") if tuple(key) not in counted]
+    with transaction.atomic():
+        # upserted rather than deleted and inserted again: concurrent refreshes of the same tags would conflict
+        ContributionTagFacet.objects.bulk_create(
+            [
+                ContributionTagFacet(
+                    tag_id=tag_id,
+                    slug=row["tags__slug"],
+                    name=row["tags__name"],
+                    theme=theme,
+                    scale=scale,
+                    count=row["count"],
+                )
+                for (tag_id, theme, scale), row in counted.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["tag", "theme", "scale"],
+            update_fields=["count", "name", "slug"],
+        )
+        ContributionTagFacet.objects.filter(pk__in=stale).delete()
+    tag_facets.invalidate()
+
+
+def refresh_contribution_facets(contributions):
+    """Recount the facets of the tags of the given contribution ids"""
+    tag_ids = Contribution.tags.through.objects.filter(
+        content_type__app_label="event", content_type__model="contribution", object_id__in=contributions
+    ).values_list("tag_id", flat=True)
+    refresh_tag_facets(tag_ids)
+
+
+def load_tag_facets():
+    facets = {}
+    for slug, name, theme, scale, count in ContributionTagFacet.objects.order_by("name").values_list(
+        "slug", "name", "theme", "scale", "count"
+    ):
+        facets.setdefault(slug, TagFacet(slug, name, {})).counts[(theme, scale)] = count
+    return facets
+
+
+tag_facets = GenerationCache("tag_facets", load_tag_facets)
+
+
+def get_tag_facets():
+    """Used tags by slug, each with its number of public contributions by (theme, scale)"""
+    return tag_facets.get()
+
+
+def get_tag_choices(theme=None, scale=None):
+    """(slug, label) of the tags used by public contributions matching the theme and scale filters"""
+    choices = []
+    for facet in get_tag_facets().values():
+        count = sum(
+            count
+            for (facet_theme, facet_scale), count in facet.counts.items()
+            if theme in (None, facet_theme) and scale in (None, facet_scale)
+        )
+        if count:
+            choices.append((facet.slug, f"{facet.name} ({count})"))
+    return choices
@@ -3,8 +3,8 @@ from django.contrib.auth import get_user_model
 from django.forms.fields import SplitDateTimeField
 from django.forms.models import ModelForm
 from django.utils import timezone
-from taggit.models import Tag
 
+from event.facets import get_tag_choices
 from event.models import Booking, Contribution, ContributionStatus, Event
 
 
@@ -93,6 +93,17 @@ class EventForm(ModelForm):
 
 
 class EventListFilterForm(forms.Form):
+    q = forms.CharField(
+        label="Rechercher",
+        max_length=200,
+        widget=forms.TextInput(
+            attrs={
+                "class": "fr-input",
+                "type": "search",
+                "placeholder": "Sujet, ville, lieu, code postal...",
+            }
+        ),
+    )
     theme = forms.ChoiceField(
         label="Thématique",
         choices=[("", "Toutes")] + Event.Theme.choices,
@@ -125,6 +136,18 @@ class EventListFilterForm(forms.Form):
 
 
 class ContributionListFilterForm(forms.Form):
+    q = forms.CharField(
+        label="Rechercher",
+        max_length=200,
+        widget=forms.TextInput(
+            attrs={
+                "class": "fr-input",
+                "type": "search",
+                "placeholder": "Mots-clés, titre...",
+            }
+        ),
+    )
+
     theme = forms.ChoiceField(
         label="Thématique",
         choices=[("", "Toutes")] + Event.Theme.choices,
@@ -157,14 +180,24 @@ class ContributionListFilterForm(forms.Form):
         ),
     )
 
+    status = forms.ChoiceField(
+        label="Statut",
+        choices=[("", "Tous")] + ContributionStatus.Status.choices,
+        widget=forms.Select(
+            attrs={
+                "class": "fr-select",
+                "onchange": "this.form.submit()",
+            }
+        ),
+    )
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields["tag"].choices = [("", "Tous")] + list(self._get_choices_for_tag())
 
     def _get_choices_for_tag(self):
-        tags = Tag.objects.all().order_by("name")
-        # TODO : filter for only display used tag
-        return tags.values_list("slug", "name")
+        # only the tags used by public contributions, with their count under the selected filters
+        return get_tag_choices(theme=self.initial.get("theme"), scale=self.initial.get("scale"))
 
 
 class EventRegistrationForm(ModelForm):
@@ -0,0 +1,108 @@
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from event.models import Event
+from utils.cache import bump_generation
+
+
+logger = logging.getLogger(__name__)
+
+# widths of the WebP derivatives, for the cards (1 and 2 pixels per CSS pixel) and the wider pages
+DERIVATIVE_WIDTHS = (320, 640, 960, 1280)
+WEBP_QUALITY = 80
+# encoder effort from 0 to 6: 6 takes several times longer for a few percent smaller files, in the saving request
+WEBP_METHOD = 4
+
+
+def get_derivative_names(derivatives):
+    return [name for width, name in derivatives.items() if width != "source"]
+
+
+def delete_derivatives(storage, names):
+    for name in names:
+        storage.delete(name)
+
+
+def generate_image_derivatives(event):
+    """
+    Write a WebP copy of the event image at each width of DERIVATIVE_WIDTHS narrower than the
+    original, and store their names with the image dimensions. Replaces those of a previous image.
+    """
+    # those stored, a generation may have run since the instance was saved
+    previous = Event.objects.filter(pk=event.pk).values_list("image_derivatives", flat=True).first()
+    if previous is None:
+        # deleted meanwhile, along with its derivatives
+        return
+    derivatives = {"source": event.image.name}
+    width = height = None
+    try:
+        with event.image.open("rb") as file, Image.open(file) as original:
+            # phone pictures are stored sideways with an orientation tag
+            image = ImageOps.exif_transpose(original)
+            width, height = image.size
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if image.mode in ("LA", "PA") or "transparency" in image.info else "RGB")
+            stem = os.path.splitext(os.path.basename(event.image.name))[0]
+            for target in DERIVATIVE_WIDTHS:
+                if target >= width:
+                    break
+                buffer = io.BytesIO()
+                resized = image.resize((target, max(1, round(height * target / width))), Image.Resampling.LANCZOS)
+                resized.save(buffer, "WEBP", quality=WEBP_QUALITY, method=WEBP_METHOD)
+                derivatives[str(target)] = event.image.storage.save(
+                    f"images/derivatives/{stem}-{target}w.webp", ContentFile(buffer.getvalue())
+                )
+    except (OSError, Image.DecompressionBombError) as exc:
+        # the original is still shown, and not processed again until replaced
+        logger.warning("Impossible de générer les dérivés de l'image %s : %s", event.image.name, exc)
+
+    event.image_width, event.image_height, event.image_derivatives = width, height, derivatives
+    # no post_save: the event itself has not changed, only its cached cards must be rendered again
+    Event.objects.filter(pk=event.pk).update(
+        image_width=width, image_height=height, image_derivatives=derivatives, updated_at=timezone.now()
+    )
+    bump_generation("events")
+    # a storage overwriting the files may have reused a previous name
+    delete_derivatives(event.image.storage, set(get_derivative_names(previous)) - set(derivatives.values()))
+
+
+def clear_image_derivatives(event):
+    """Delete the derivatives of a removed image"""
+    previous = Event.objects.filter(pk=event.pk).values_list("image_derivatives", flat=True).first() or {}
+    delete_derivatives(event.image.storage, get_derivative_names(previous))
+    event.image_width = event.image_height = None
+    event.image_derivatives = {}
+    Event.objects.filter(pk=event.pk).update(image_width=None, image_height=None, image_derivatives={})
+
+
+def load_image_derivatives(event):
+    """
+    Before a save, reload the derivative fields, only written with update() by this module:
+    an instance loaded before the last generation would otherwise forget the derivatives, left undeleted.
+    """
+    if event._state.adding:
+        return
+    stored = Event.objects.filter(pk=event.pk).values_list("image_width", "image_height", "image_derivatives").first()
+    if stored is not None:
+        event.image_width, event.image_height, event.image_derivatives = stored
+
+
+def update_image_derivatives(event):
+    """Bring the derivatives up to date with the event image, once the transaction that changed it is committed"""
+    if event.image and event.image_derivatives.get("source") != event.image.name:
+        transaction.on_commit(lambda: generate_image_derivatives(event))
+    elif not event.image and event.image_derivatives:
+        transaction.on_commit(lambda: clear_image_derivatives(event))
+
+
+def delete_image_derivatives(event):
+    """Delete the derivatives of a deleted event, once the deletion is committed"""
+    names = get_derivative_names(event.image_derivatives)
+    if names:
+        transaction.on_commit(lambda: delete_derivatives(event.image.storage, names))
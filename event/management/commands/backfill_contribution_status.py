@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+from event.models import Contribution, ContributionStatus
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized current status of contributions from their status history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        latest_status = ContributionStatus.objects.filter(contribution=OuterRef("pk")).order_by("-pk").values("pk")[:1]
+        last_pk = Contribution.objects.aggregate(last_pk=Max("pk"))["last_pk"] or 0
+        updated = 0
+        # batches of primary keys keep each UPDATE (and its locks) short
+        for start in range(0, last_pk + 1, options["batch_size"]):
+            updated += Contribution.objects.filter(pk__gte=start, pk__lt=start + options["batch_size"]).update(
+                current_status=Subquery(latest_status), updated_at=timezone.now()
+            )
+        self.stdout.write(f"{updated} contribution(s) mise(s) à jour")
@@ -0,0 +1,134 @@
+import json
+import platform
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from event.models import Booking, Contribution, ContributionTagFacet, Event
+from signup.models import EmailBasedUser
+from utils.benchmark import compare_reports, measure_view
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the latency, queries and memory of the main views in-process, on the current database "
+        "(filled with seed_scale), write a JSON report and compare it with a baseline report"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--output", default="benchmark.json", help="path of the JSON report")
+        parser.add_argument("--baseline", help="JSON report to compare with")
+        parser.add_argument("--threshold", type=float, default=0.2, help="tolerated growth ratio (0.2 = 20%%)")
+        parser.add_argument("--view", action="append", dest="views", help="only measure this view (repeatable)")
+        parser.add_argument(
+            "--page-cache", action="store_true", help="serve the anonymous pages from the page cache, as in production"
+        )
+
+    def get_scenarios(self):
+        """(name, user, method, path, data) of each measured request, on the busiest published event"""
+        event = (
+            Event.objects.filter(pub_status=Event.PubStatus.PUB)
+            .annotate(booking_count=Count("bookings"))
+            .order_by("-booking_count", "pk")
+            .first()
+        )
+        if event is None:
+            raise CommandError("Aucune concertation publiée : lancez d'abord manage.py seed_scale")
+        booking = Booking.objects.filter(event=event).select_related("participant").first()
+        participant = booking.participant if booking else EmailBasedUser.objects.filter(is_organizer=False).first()
+        contribution = Contribution.objects.filter(public=True, event__pub_status=Event.PubStatus.PUB).first()
+        facet = ContributionTagFacet.objects.order_by("-count").first()
+
+        scenarios = [
+            ("event_list", None, "get", reverse("event_list"), {}),
+            ("event_list_upcoming", None, "get", reverse("event_list"), {"upcoming": "on"}),
+            ("event_list_search", None, "get", reverse("event_list"), {"q": event.city}),
+            ("event_detail", participant, "get", reverse("event_detail", args=[event.pk]), {}),
+            ("contribution_list", None, "get", reverse("contribution_list"), {}),
+            ("contribution_list_search", None, "get", reverse("contribution_list"), {"q": event.subject}),
+            ("event_organizer_dashboard", event.owner, "get", reverse("event_organizer_dashboard"), {}),
+            (
+                "event_organizer_event_detail",
+                event.owner,
+                "get",
+                reverse("event_organizer_event_detail", args=[event.pk]),
+                {},
+            ),
+            (
+                "event_organizer_event_participants_export",
+                event.owner,
+                "get",
+                reverse("event_organizer_event_participants_export", args=[event.pk]),
+                {},
+            ),
+        ]
+        if facet is not None:
+            scenarios.append(("contribution_list_tag", None, "get", reverse("contribution_list"), {"tag": facet.slug}))
+        if contribution is not None:
+            scenarios.append(
+                ("contribution_detail", None, "get", reverse("contribution_detail", args=[contribution.pk]), {})
+            )
+        return scenarios
+
+    def get_dataset(self):
+        return {
+            "users": EmailBasedUser.objects.count(),
+            "events": Event.objects.count(),
+            "bookings": Booking.objects.count(),
+            "contributions": Contribution.objects.count(),
+        }
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 2:
+            raise CommandError("Il faut au moins 2 itérations pour calculer des percentiles")
+        scenarios = self.get_scenarios()
+        if options["views"]:
+            scenarios = [scenario for scenario in scenarios if scenario[0] in options["views"]]
+
+        # the requests go through the whole middleware stack, with a host the settings accept
+        host = next((host for host in settings.ALLOWED_HOSTS if host != "*"), "testserver")
+        client = Client(HTTP_HOST=host.lstrip("."))
+        report = {
+            "page_cache": options["page_cache"],
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "dataset": self.get_dataset(),
+            "views": {},
+        }
+        for name, user, method, path, data in scenarios:
+            if user is None:
+                client.logout()
+            else:
+                client.force_login(user)
+            # by default, the views themselves are measured rather than the page cache
+            with override_settings(PAGE_CACHE_TIMEOUT=settings.PAGE_CACHE_TIMEOUT if options["page_cache"] else 0):
+                results = measure_view(client, method, path, data, options["iterations"], options["warmup"])
+            report["views"][name] = results
+            self.stdout.write(
+                f"{name}: p50 {results['p50_ms']} ms, p95 {results['p95_ms']} ms, p99 {results['p99_ms']} ms, "
+                f"{results['queries']} requête(s) en {results['query_ms']} ms, {results['peak_memory_kib']} Kio"
+            )
+            if results["status"] >= 400:
+                self.stderr.write(f"{name}: statut HTTP {results['status']}")
+
+        with open(options["output"], "w") as report_file:
+            json.dump(report, report_file, indent=2)
+        self.stdout.write(f"Rapport écrit dans {options['output']}")
+
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                baseline = json.load(baseline_file)
+            regressions = compare_reports(baseline, report, options["threshold"])
+            for name, metric, before, after in regressions:
+                self.stderr.write(f"{name}: {metric} {before} -> {after}")
+            if regressions:
+                raise CommandError(f"{len(regressions)} régression(s) par rapport à {options['baseline']}")
+            self.stdout.write("Aucune régression")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from event.images import generate_image_derivatives
+from event.models import Event
+
+
+class Command(BaseCommand):
+    help = "Generate the missing WebP derivatives of the event images, e.g. for the images uploaded before them"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="also regenerate the existing derivatives")
+
+    def handle(self, *args, **options):
+        events = Event.objects.exclude(Q(image="") | Q(image__isnull=True)).order_by("pk")
+        count = 0
+        for event in events.iterator(chunk_size=100):
+            if options["force"] or event.image_derivatives.get("source") != event.image.name:
+                generate_image_derivatives(event)
+                count += 1
+        self.stdout.write(f"{count} image(s) traitée(s)")
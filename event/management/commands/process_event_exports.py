@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from event.exports import process_pending_export
+from utils.metrics import start_worker_metrics_server
+
+
+class Command(BaseCommand):
+    help = "Build the pending event export archives"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process the pending exports then exit")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when there is nothing to do")
+
+    def handle(self, *args, **options):
+        if not options["once"]:
+            start_worker_metrics_server()
+        while True:
+            export = process_pending_export()
+            if export is not None:
+                self.stdout.write(f"Export {export.pk} : {export.get_status_display()}")
+            elif options["once"]:
+                return
+            else:
+                time.sleep(options["sleep"])
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from event.facets import refresh_tag_facets
+from event.models import ContributionTagFacet
+
+
+class Command(BaseCommand):
+    help = "Recompute the tag facets of the contribution list from scratch"
+
+    def handle(self, *args, **options):
+        refresh_tag_facets()
+        self.stdout.write(f"{ContributionTagFacet.objects.count()} facette(s) d'étiquettes")
@@ -0,0 +1,266 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Min, Q
+from taggit.models import Tag, TaggedItem
+
+from event.facets import refresh_tag_facets
+from event.models import Booking, Contribution, ContributionStatus, ContributionTagFacet, Event, EventExport
+from event.search import update_search_vectors
+from signup.factories import default_password
+from signup.models import EmailBasedUser
+from utils.cache import bump_generation
+
+
+# seeded rows are recognisable, so that --clear only removes them
+EMAIL_DOMAIN = "seed.invalid"
+TAG_PREFIX = "seed-"
+
+WORDS = (
+    "école climat santé logement jeunesse numérique transport énergie eau biodiversité emploi formation "
+    "quartier mobilité vélo alimentation culture sport solidarité handicap retraite hôpital médecin "
+    "rénovation isolation commerce agriculture forêt déchets recyclage sécurité participation citoyenne"
+).split()
+CITIES = (
+    "Paris Marseille Lyon Toulouse Nice Nantes Montpellier Strasbourg Bordeaux Lille Rennes Reims Toulon "
+    "Grenoble Dijon Angers Nîmes Villeurbanne Clermont-Ferrand Brest Limoges Tours Amiens Metz Perpignan"
+).split()
+FIRST_NAMES = "Camille Dominique Claude Alex Sacha Charlie Lou Maxime Morgan Noa Eden Ange".split()
+LAST_NAMES = "Martin Bernard Dubois Thomas Robert Richard Petit Durand Leroy Moreau Simon Laurent".split()
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Generate a large deterministic dataset with bulk inserts, for benchmarks and index work"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20000)
+        parser.add_argument("--events", type=int, default=5000)
+        parser.add_argument("--bookings", type=int, default=100000)
+        parser.add_argument("--contributions", type=int, default=50000)
+        parser.add_argument("--tags", type=int, default=500)
+        parser.add_argument("--tags-per-contribution", type=int, default=3)
+        parser.add_argument("--max-statuses", type=int, default=3, help="statuses per contribution, at most")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--now",
+            type=datetime.fromisoformat,
+            default=datetime(2025, 1, 1, tzinfo=timezone.utc),
+            help="date around which the dates are generated, fixed so that a seed always gives the same data",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--clear", action="store_true", help="remove the previously seeded data first")
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["events"] < 1:
+            raise CommandError("Il faut au moins un utilisateur et une concertation")
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = options["now"] if options["now"].tzinfo else options["now"].replace(tzinfo=timezone.utc)
+        if options["clear"]:
+            self.clear()
+
+        # there is at most one booking for each (event, participant) pair
+        options["bookings"] = min(options["bookings"], options["events"] * options["users"])
+
+        user_ids = self.step("utilisateurs", self.create_users, options["users"])
+        event_ids = self.step("concertations", self.create_events, options["events"], user_ids)
+        self.step("participations", self.create_bookings, options["bookings"], event_ids, user_ids)
+        contribution_ids = self.step("contributions", self.create_contributions, options["contributions"], event_ids)
+        tag_ids = self.step("étiquettes", self.create_tags, options["tags"])
+        self.step("étiquetages", self.create_tagged_items, contribution_ids, tag_ids, options["tags_per_contribution"])
+        self.step("statuts", self.create_statuses, contribution_ids, options["max_statuses"])
+        self.step("données dérivées", self.refresh_derived_data, contribution_ids)
+
+    def step(self, label, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        count = f"{len(result)} " if isinstance(result, list) else ""
+        self.stdout.write(f"{count}{label} en {time.perf_counter() - start:.1f}s")
+        return result
+
+    def bulk_create(self, model, objects):
+        """Insert by batches, in one transaction per batch, and return the primary keys"""
+        ids = []
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic():
+                ids.extend(obj.pk for obj in model.objects.bulk_create(batch))
+        return ids
+
+    def clear(self):
+        users = EmailBasedUser.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}")
+        events = Event.objects.filter(owner__in=users)
+        contributions = Contribution.objects.filter(event__in=events)
+        tags = Tag.objects.filter(slug__startswith=TAG_PREFIX)
+        content_type = ContentType.objects.get_for_model(Contribution)
+        with transaction.atomic():
+            # references of the remaining rows to the seeded users
+            Booking.objects.filter(cancelled_by__in=users).update(cancelled_by=None)
+            EventExport.objects.filter(requested_by__in=users).update(requested_by=None)
+            # one DELETE per table, in dependency order: the ORM would collect the rows and cascade batch by batch
+            for queryset in (
+                TaggedItem.objects.filter(
+                    Q(tag__in=tags) | Q(content_type=content_type, object_id__in=contributions.values("pk"))
+                ),
+                ContributionTagFacet.objects.filter(tag__in=tags),
+                ContributionStatus.objects.filter(contribution__in=contributions),
+                contributions,
+                Booking.objects.filter(Q(event__in=events) | Q(participant__in=users)),
+                EventExport.objects.filter(event__in=events),
+                Event.organizers.through.objects.filter(Q(event__in=events) | Q(emailbaseduser__in=users)),
+                events,
+                tags,
+                EmailBasedUser.groups.through.objects.filter(emailbaseduser__in=users),
+                EmailBasedUser.user_permissions.through.objects.filter(emailbaseduser__in=users),
+                users,
+            ):
+                queryset._raw_delete(queryset.db)
+        self.stdout.write("Données générées supprimées")
+
+    def create_users(self, count):
+        # a single password hash: hashing is by far the slowest part of creating a user
+        password = default_password()
+        first_user = (EmailBasedUser.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        return self.bulk_create(
+            EmailBasedUser,
+            (
+                EmailBasedUser(
+                    username=f"seed-{first_user + index}",
+                    email=f"seed-{first_user + index}@{EMAIL_DOMAIN}",
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    password=password,
+                    is_organizer=index % 20 == 0,
+                )
+                for index in range(count)
+            ),
+        )
+
+    def sentence(self, words):
+        return " ".join(self.rng.choice(WORDS) for _ in range(words)).capitalize()
+
+    def create_events(self, count, user_ids):
+        organizer_ids = user_ids[::20] or user_ids
+        first_start = self.now.replace(minute=0, second=0, microsecond=0) - timedelta(days=365)
+        pub_statuses = [Event.PubStatus.PUB] * 3 + [Event.PubStatus.PRIV, Event.PubStatus.UNPUB]
+        events = []
+        for index in range(count):
+            start = first_start + timedelta(days=self.rng.randrange(730), hours=self.rng.randrange(8, 20))
+            city = self.rng.choice(CITIES)
+            events.append(
+                Event(
+                    owner_id=organizer_ids[index % len(organizer_ids)],
+                    pub_status=self.rng.choice(pub_statuses),
+                    theme=self.rng.choice(Event.Theme.values),
+                    sub_theme=self.sentence(2),
+                    subject=self.sentence(5),
+                    description=self.sentence(40),
+                    scale=self.rng.choice(Event.Scale.values),
+                    start=start,
+                    end=start + timedelta(hours=self.rng.randrange(1, 6)),
+                    place_name=f"Mairie de {city}",
+                    address=f"{self.rng.randrange(1, 200)} rue de la République",
+                    zip_code=f"{self.rng.randrange(1, 96):02d}{self.rng.randrange(1000):03d}",
+                    city=city,
+                    booking_online=True,
+                    participant_help=self.rng.random() < 0.5,
+                )
+            )
+        event_ids = self.bulk_create(Event, events)
+        self.bulk_create(
+            Event.organizers.through,
+            (
+                Event.organizers.through(event_id=event.pk, emailbaseduser_id=event.owner_id)
+                for event in Event.objects.filter(pk__in=event_ids).only("pk", "owner_id").iterator()
+            ),
+        )
+        return event_ids
+
+    def create_bookings(self, count, event_ids, user_ids):
+        def bookings():
+            for index in range(count):
+                # the participant shifts by one each time the events wrap around: the pairs stay distinct
+                state = self.rng.random()
+                yield Booking(
+                    event_id=event_ids[index % len(event_ids)],
+                    participant_id=user_ids[(index // len(event_ids) + index % len(event_ids)) % len(user_ids)],
+                    offer_help=state < 0.3,
+                    confirmed_on=self.now if state < 0.6 else None,
+                    cancelled_on=self.now if 0.6 <= state < 0.7 else None,
+                )
+
+        return self.bulk_create(Booking, bookings())
+
+    def create_contributions(self, count, event_ids):
+        return self.bulk_create(
+            Contribution,
+            (
+                Contribution(
+                    event_id=self.rng.choice(event_ids),
+                    kind=self.rng.choice(Contribution.Kind.values),
+                    title=self.sentence(6),
+                    description=self.sentence(60),
+                    public=self.rng.random() < 0.7,
+                )
+                for _ in range(count)
+            ),
+        )
+
+    def create_tags(self, count):
+        first_tag = (Tag.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        return self.bulk_create(
+            Tag,
+            (
+                Tag(name=f"{self.rng.choice(WORDS)} {first_tag + index}", slug=f"{TAG_PREFIX}{first_tag + index}")
+                for index in range(count)
+            ),
+        )
+
+    def create_tagged_items(self, contribution_ids, tag_ids, per_contribution):
+        if not tag_ids:
+            return []
+        content_type = ContentType.objects.get_for_model(Contribution)
+        return self.bulk_create(
+            TaggedItem,
+            (
+                TaggedItem(content_type=content_type, object_id=contribution_id, tag_id=tag_id)
+                for contribution_id in contribution_ids
+                for tag_id in self.rng.sample(tag_ids, min(per_contribution, len(tag_ids)))
+            ),
+        )
+
+    def create_statuses(self, contribution_ids, max_statuses):
+        def statuses():
+            for contribution_id in contribution_ids:
+                change_on = self.now.date() - timedelta(days=self.rng.randrange(365))
+                for _ in range(self.rng.randrange(max_statuses + 1)):
+                    yield ContributionStatus(
+                        contribution_id=contribution_id,
+                        status=self.rng.choice(ContributionStatus.Status.values),
+                        change_on=change_on,
+                    )
+                    change_on += timedelta(days=self.rng.randrange(1, 60))
+
+        return self.bulk_create(ContributionStatus, statuses())
+
+    def refresh_derived_data(self, contribution_ids):
+        """What the signals and ContributionStatus.save maintain, skipped by bulk_create"""
+        call_command("backfill_contribution_status", batch_size=self.batch_size, stdout=self.stdout)
+        if contribution_ids:
+            bounds = Contribution.objects.filter(pk__in=contribution_ids).aggregate(first=Min("pk"), last=Max("pk"))
+            for start in range(bounds["first"], bounds["last"] + 1, self.batch_size):
+                update_search_vectors(Contribution.objects.filter(pk__gte=start, pk__lt=start + self.batch_size))
+        refresh_tag_facets()
+        bump_generation("events")
+        bump_generation("contributions")
@@ -0,0 +1,29 @@
+# Generated by Django 4.1.9 on 2026-10-18 11:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0014_eventexport"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contribution",
+            name="current_status",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="event.contributionstatus",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contributionstatus",
+            index=models.Index(fields=["contribution", "id"], name="event_status_contribution_idx"),
+        ),
+    ]
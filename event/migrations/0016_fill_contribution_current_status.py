@@ -0,0 +1,19 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def _fill_current_status(apps, schema_editor):  # pylint: disable=unused-argument
+    Contribution = apps.get_model("event", "Contribution")
+    ContributionStatus = apps.get_model("event", "ContributionStatus")
+    latest_status = ContributionStatus.objects.filter(contribution=OuterRef("pk")).order_by("-pk").values("pk")[:1]
+    Contribution.objects.update(current_status=Subquery(latest_status))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0015_contribution_current_status"),
+    ]
+
+    operations = [
+        migrations.RunPython(_fill_current_status, migrations.RunPython.noop, elidable=True),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.1.9 on 2026-10-18 11:58
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations
+
+
+FILL_SEARCH_VECTOR = """
+UPDATE event_contribution SET search_vector =
+    setweight(to_tsvector('french'::regconfig, unaccent(COALESCE(title, ''))), 'A')
+    || setweight(to_tsvector('french'::regconfig, unaccent(COALESCE(description, ''))), 'B')
+    || setweight(to_tsvector('french'::regconfig, unaccent(COALESCE((
+        SELECT string_agg(taggit_tag.name, ' ')
+        FROM taggit_taggeditem
+        INNER JOIN taggit_tag ON taggit_tag.id = taggit_taggeditem.tag_id
+        INNER JOIN django_content_type ON django_content_type.id = taggit_taggeditem.content_type_id
+        WHERE django_content_type.app_label = 'event'
+            AND django_content_type.model = 'contribution'
+            AND taggit_taggeditem.object_id = event_contribution.id
+    ), ''))), 'C')
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("taggit", "0005_auto_20220424_2025"),
+        ("event", "0016_fill_contribution_current_status"),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        migrations.AddField(
+            model_name="contribution",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="contribution",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="event_contribution_search_idx"
+            ),
+        ),
+        migrations.RunSQL(FILL_SEARCH_VECTOR, migrations.RunSQL.noop, elidable=True),
+    ]
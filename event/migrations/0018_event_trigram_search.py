@@ -0,0 +1,23 @@
+# Generated by Django 4.1.9 on 2026-10-18 12:02
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0017_contribution_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="event",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["subject", "sub_theme", "city", "place_name", "zip_code"],
+                name="event_event_trigram_idx",
+                opclasses=["gin_trgm_ops", "gin_trgm_ops", "gin_trgm_ops", "gin_trgm_ops", "gin_trgm_ops"],
+            ),
+        ),
+    ]
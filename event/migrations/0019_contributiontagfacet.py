@@ -0,0 +1,82 @@
+# Generated by Django 4.1.9 on 2026-10-18 12:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+FILL_TAG_FACETS = """
+INSERT INTO event_contributiontagfacet (tag_id, slug, name, theme, scale, count)
+SELECT taggit_tag.id, taggit_tag.slug, taggit_tag.name, event_event.theme, event_event.scale, COUNT(*)
+FROM taggit_taggeditem
+INNER JOIN taggit_tag ON taggit_tag.id = taggit_taggeditem.tag_id
+INNER JOIN django_content_type ON django_content_type.id = taggit_taggeditem.content_type_id
+INNER JOIN event_contribution ON event_contribution.id = taggit_taggeditem.object_id
+INNER JOIN event_event ON event_event.id = event_contribution.event_id
+WHERE django_content_type.app_label = 'event'
+    AND django_content_type.model = 'contribution'
+    AND event_contribution.public
+    AND event_event.pub_status = 'pub'
+GROUP BY taggit_tag.id, event_event.theme, event_event.scale
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("taggit", "0005_auto_20220424_2025"),
+        ("event", "0018_event_trigram_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContributionTagFacet",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("slug", models.SlugField(max_length=100)),
+                ("name", models.CharField(max_length=100)),
+                (
+                    "theme",
+                    models.CharField(
+                        choices=[
+                            ("assist", "Assises du travail"),
+                            ("vieill", "Bien vieillir"),
+                            ("biodiv", "Climat et Biodiversité"),
+                            ("ecole", "École"),
+                            ("fratra", "France Travail"),
+                            ("jeunes", "Jeunesse"),
+                            ("logeme", "Logement"),
+                            ("num", "Numérique"),
+                            ("sante", "Santé"),
+                        ],
+                        max_length=6,
+                    ),
+                ),
+                (
+                    "scale",
+                    models.CharField(
+                        choices=[
+                            ("loc", "Locale"),
+                            ("reg", "Régionale"),
+                            ("dep", "Départementale"),
+                            ("nat", "Nationale"),
+                        ],
+                        max_length=3,
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "tag",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="taggit.tag"),
+                ),
+            ],
+            options={
+                "verbose_name": "Facette d'étiquette",
+                "verbose_name_plural": "Facettes d'étiquettes",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="contributiontagfacet",
+            constraint=models.UniqueConstraint(fields=("tag", "theme", "scale"), name="event_tag_facet_unique"),
+        ),
+        migrations.RunSQL(FILL_TAG_FACETS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.9 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0019_contributiontagfacet"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                condition=models.Q(("cancelled_on__isnull", True), ("confirmed_on__isnull", True)),
+                fields=["event"],
+                name="event_booking_pending_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contribution",
+            index=models.Index(
+                condition=models.Q(("public", True)), fields=["title", "id"], name="event_contribution_public_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                condition=models.Q(("pub_status", "pub")), fields=["start", "end", "id"], name="event_public_order_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import DateTimeField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Least
+
+
+def _backfill_updated_at(apps, schema_editor):  # pylint: disable=unused-argument
+    """
+    Date the existing rows rather than leaving them all at the migration time: there is no creation date,
+    so the events get their start (not in the future) and the contributions their last status change, else the
+    date of their event.
+    """
+    Event = apps.get_model("event", "Event")
+    Contribution = apps.get_model("event", "Contribution")
+    ContributionStatus = apps.get_model("event", "ContributionStatus")
+    now = Value(django.utils.timezone.now())
+    Event.objects.update(updated_at=Least("start", now))
+    last_change = (
+        ContributionStatus.objects.filter(contribution=OuterRef("pk"))
+        .values("contribution")
+        .annotate(last=Max("change_on"))
+        .values("last")
+    )
+    event_date = Event.objects.filter(pk=OuterRef("event_id")).values("updated_at")
+    Contribution.objects.update(
+        # LEAST ignores NULL: coalesced first
+        updated_at=Least(Coalesce(Cast(Subquery(last_change), DateTimeField()), Subquery(event_date)), now)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0020_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contribution",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(_backfill_updated_at, migrations.RunPython.noop, elidable=True),
+    ]
@@ -1,9 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import FileExtensionValidator
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
-from django.utils.functional import cached_property
 from taggit.managers import TaggableManager
+from taggit.models import Tag
 
 
 class CurrentUpcomingManager(models.Manager):
@@ -97,6 +100,10 @@ class Event(models.Model):
     )
     practical_information = models.TextField(verbose_name="Infos pratiques", null=True, blank=True)
     image = models.ImageField(verbose_name="Image d'illustration", upload_to="images", blank=True, null=True)
+    # set with the WebP derivatives of the image (event.images), rather than read from the storage
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     booking_online = models.BooleanField(verbose_name="Inscription en ligne")
     # TODO: who and how many can booking
 
@@ -110,6 +117,9 @@ class Event(models.Model):
         validators=[FileExtensionValidator(["pdf"])],
     )
 
+    # also bumped by the changes shown in the event card, which is cached on it
+    updated_at = models.DateTimeField(auto_now=True)
+
     objects = models.Manager()
     current_and_upcomings = CurrentUpcomingManager()
 
@@ -117,10 +127,23 @@ class Event(models.Model):
         verbose_name = "Concertation"
         verbose_name_plural = "Concertations"
         ordering = ["start", "end"]
+        indexes = [
+            GinIndex(
+                fields=["subject", "sub_theme", "city", "place_name", "zip_code"],
+                opclasses=["gin_trgm_ops"] * 5,
+                name="event_event_trigram_idx",
+            ),
+            # public list, in its keyset order; also serves the upcoming filter (range on start)
+            models.Index(fields=["start", "end", "id"], condition=Q(pub_status="pub"), name="event_public_order_idx"),
+        ]
 
     def __str__(self):
         return f"{self.theme} - {self.subject} - {self.start}"
 
+    def get_cache_version(self):
+        """Version of the cached fragments rendering this event"""
+        return self.updated_at.timestamp()
+
 
 class Booking(models.Model):
     """
@@ -146,6 +169,14 @@ class Booking(models.Model):
         verbose_name_plural = "Participations"
         unique_together = ("event", "participant")
         ordering = ["id"]
+        indexes = [
+            # pending bookings of an event, for the organizer bulk actions
+            models.Index(
+                fields=["event"],
+                condition=Q(confirmed_on__isnull=True, cancelled_on__isnull=True),
+                name="event_booking_pending_idx",
+            )
+        ]
 
 
 class Contribution(models.Model):
@@ -172,15 +203,35 @@ class Contribution(models.Model):
     tags = TaggableManager(
         verbose_name="Étiquettes", help_text="Ajoutez des étiquettes (tags) séparés par des virgules", blank=True
     )
+    # latest ContributionStatus, maintained by ContributionStatus.save
+    current_status = models.ForeignKey(
+        "ContributionStatus",
+        blank=True,
+        null=True,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        editable=False,
+    )
+    # title, description and tag names, maintained by event.signals for the full-text search
+    search_vector = SearchVectorField(null=True, editable=False)
+    # also bumped by tag and status changes (see event.signals and ContributionStatus.save)
+    updated_at = models.DateTimeField(auto_now=True)
     # TODO: document complémentaires
 
-    @cached_property
-    def current_status(self):
-        return ContributionStatus.objects.filter(contribution=self).last()
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="event_contribution_search_idx"),
+            # public list, in its keyset order
+            models.Index(fields=["title", "id"], condition=Q(public=True), name="event_contribution_public_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+    def get_cache_version(self):
+        """Version of the cached fragments rendering this contribution, which show some of its event fields"""
+        return f"{self.updated_at.timestamp()}-{self.event.updated_at.timestamp()}"
+
 
 class ContributionStatus(models.Model):
     class Status(models.TextChoices):
@@ -196,3 +247,82 @@ class ContributionStatus(models.Model):
         default=Status.STUDY,
         verbose_name="Statut",
     )
+
+    class Meta:
+        indexes = [models.Index(fields=["contribution", "id"], name="event_status_contribution_idx")]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # statuses are appended: the one with the highest id is the current one
+        Contribution.objects.filter(
+            Q(current_status__isnull=True) | Q(current_status__lte=self.pk), pk=self.contribution_id
+        ).update(current_status=self, updated_at=timezone.now())
+        if self._meta.get_field("contribution").is_cached(self):
+            self.contribution.current_status = self
+
+
+class EventExport(models.Model):
+    """
+    Zip archive of an event data (participants, contributions, status history),
+    generated in the background by the export worker
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "En attente"
+        RUNNING = "running", "En cours"
+        DONE = "done", "Terminé"
+        FAILED = "failed", "En échec"
+
+    event = models.ForeignKey("Event", related_name="exports", on_delete=models.CASCADE)
+    requested_by = models.ForeignKey(
+        get_user_model(),
+        blank=True,
+        null=True,
+        related_name="+",
+        on_delete=models.SET_NULL,
+    )
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(
+        max_length=7,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Statut",
+    )
+    progress = models.PositiveSmallIntegerField(default=0)
+    file = models.FileField(upload_to="exports", blank=True, null=True)
+    error = models.TextField(blank=True, default="")
+    created_on = models.DateTimeField(auto_now_add=True)
+    started_on = models.DateTimeField(blank=True, null=True)
+    finished_on = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Export"
+        verbose_name_plural = "Exports"
+        ordering = ["id"]
+        indexes = [models.Index(fields=["event", "fingerprint"], name="event_export_fingerprint_idx")]
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.DONE, self.Status.FAILED)
+
+
+class ContributionTagFacet(models.Model):
+    """
+    Number of public contributions of published events using a tag, for each theme and scale.
+    Maintained by event.facets, read through its in-process cache.
+    """
+
+    tag = models.ForeignKey(Tag, related_name="+", on_delete=models.CASCADE)
+    slug = models.SlugField(max_length=100)
+    name = models.CharField(max_length=100)
+    theme = models.CharField(max_length=6, choices=Event.Theme.choices)
+    scale = models.CharField(max_length=3, choices=Event.Scale.choices)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Facette d'étiquette"
+        verbose_name_plural = "Facettes d'étiquettes"
+        constraints = [models.UniqueConstraint(fields=["tag", "theme", "scale"], name="event_tag_facet_unique")]
+
+    def __str__(self):
+        return f"{self.slug} - {self.theme} - {self.scale} : {self.count}"
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from event.models import Event
+
+
+def get_organized_events_key(user_id):
+    return f"organized_events:{user_id}"
+
+
+def get_organized_event_ids(user):
+    """
+    Ids of the events organized by the user, cached until their organizers change (invalidate_organized_events).
+    The invalidation only reaches the processes sharing the default cache: the others may keep the previous ids
+    for up to ORGANIZED_EVENTS_CACHE_TIMEOUT.
+    """
+    key = get_organized_events_key(user.pk)
+    event_ids = cache.get(key)
+    if event_ids is None:
+        event_ids = frozenset(Event.objects.filter(organizers=user).values_list("pk", flat=True))
+        cache.set(key, event_ids, settings.ORGANIZED_EVENTS_CACHE_TIMEOUT)
+    return event_ids
+
+
+def invalidate_organized_events(user_ids):
+    """Forget the organized events of the users, again on commit as a concurrent request may have cached them"""
+    keys = [get_organized_events_key(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,109 @@
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.lookups import Unaccent
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db.models import F, OuterRef, Q, QuerySet, Subquery, TextField, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from taggit.models import TaggedItem
+
+from event.models import Contribution
+
+
+SEARCH_CONFIG = "french"
+
+# covered by the event_event_trigram_idx index
+EVENT_SEARCH_FIELDS = ("subject", "sub_theme", "city", "place_name", "zip_code")
+
+# ts_headline markers, replaced by <mark> once the headline has been escaped
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+
+
+def get_search_vector():
+    """Weighted french vector over the unaccented title, description and tag names of a contribution"""
+    tag_names = (
+        TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Contribution), object_id=OuterRef("pk")
+        )
+        .values("object_id")
+        .annotate(names=StringAgg("tag__name", " "))
+        .values("names")
+    )
+    return (
+        SearchVector(Unaccent("title"), weight="A", config=SEARCH_CONFIG)
+        + SearchVector(Unaccent("description"), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(
+            Unaccent(Coalesce(Subquery(tag_names), Value(""), output_field=TextField())),
+            weight="C",
+            config=SEARCH_CONFIG,
+        )
+    )
+
+
+def update_search_vectors(contributions):
+    """Recompute the stored search vector of the given contributions (queryset or ids) with one UPDATE"""
+    if not isinstance(contributions, QuerySet):
+        contributions = Contribution.objects.filter(pk__in=contributions)
+    contributions.update(search_vector=get_search_vector())
+
+
+def get_search_query(text):
+    return SearchQuery(Unaccent(Value(text)), config=SEARCH_CONFIG, search_type="websearch")
+
+
+def get_headline_query(text):
+    # the headline is computed on the original description, with its accents: match the words as typed too
+    return SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch") | get_search_query(text)
+
+
+def search_contributions(queryset, text):
+    """Filter the contributions matching `text`, most relevant first"""
+    query = get_search_query(text)
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "pk")
+    )
+
+
+def add_headlines(contributions, text):
+    """
+    Set `headline`, the description excerpt with the matching words highlighted, on each contribution.
+    Done with one query for the displayed page only, ts_headline being expensive.
+    """
+    headlines = dict(
+        Contribution.objects.filter(pk__in=[contribution.pk for contribution in contributions])
+        .annotate(
+            headline=SearchHeadline(
+                "description",
+                get_headline_query(text),
+                config=SEARCH_CONFIG,
+                start_sel=HIGHLIGHT_START,
+                stop_sel=HIGHLIGHT_STOP,
+                max_words=35,
+                min_words=15,
+            )
+        )
+        .values_list("pk", "headline")
+    )
+    for contribution in contributions:
+        contribution.headline = format_headline(headlines.get(contribution.pk, ""))
+
+
+def format_headline(headline):
+    """Escape the user content of a ts_headline and turn its markers into <mark> tags"""
+    return mark_safe(escape(headline).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>"))
+
+
+def search_events(queryset, text):
+    """
+    Filter the events with a word close to `text` (typos included) in one of EVENT_SEARCH_FIELDS,
+    best match first. Uses the pg_trgm word similarity operator, so that the trigram index applies.
+    """
+    condition = Q()
+    for field in EVENT_SEARCH_FIELDS:
+        condition |= Q(**{f"{field}__trigram_word_similar": text})
+    similarity = Greatest(*(TrigramWordSimilarity(text, field) for field in EVENT_SEARCH_FIELDS))
+    return queryset.filter(condition).annotate(similarity=similarity).order_by("-similarity", "start", "pk")
@@ -0,0 +1,235 @@
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from taggit.models import Tag
+
+from event.facets import refresh_contribution_facets, refresh_tag_facets, tag_facets
+from event.images import delete_image_derivatives, load_image_derivatives, update_image_derivatives
+from event.models import Booking, Contribution, ContributionStatus, ContributionTagFacet, Event
+from event.permissions import invalidate_organized_events
+from event.search import update_search_vectors
+from utils.cache import bump_generation
+from utils.edge_cache import purge
+from utils.metrics import MODEL_WRITES
+
+
+@receiver(post_save, sender=Contribution)
+def update_contribution_search_vector(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not {"title", "description"} & set(update_fields)):
+        return
+    update_search_vectors([instance.pk])
+
+
+@receiver(m2m_changed, sender=Contribution.tags.through)
+def update_contribution_search_vector_on_tags(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and isinstance(instance, Contribution):
+        update_search_vectors([instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+def update_search_vectors_on_tag_rename(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        update_search_vectors(Contribution.objects.filter(tags=instance))
+
+
+@receiver(post_save, sender=Contribution)
+def update_tag_facets(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # a new contribution has no tags yet, they are counted when added
+    if created or raw or (update_fields is not None and not {"public", "event"} & set(update_fields)):
+        return
+    refresh_contribution_facets([instance.pk])
+
+
+@receiver(pre_delete, sender=Contribution)
+def remember_deleted_contribution_tags(sender, instance, **kwargs):
+    instance._facet_tag_ids = list(instance.tags.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Contribution)
+def update_tag_facets_on_delete(sender, instance, **kwargs):
+    refresh_tag_facets(getattr(instance, "_facet_tag_ids", []))
+
+
+@receiver(m2m_changed, sender=Contribution.tags.through)
+def update_tag_facets_on_tags(sender, instance, action, pk_set=None, **kwargs):
+    if not isinstance(instance, Contribution):
+        # changed from the tag side
+        if action in ("post_add", "post_remove", "post_clear"):
+            refresh_tag_facets([instance.pk])
+    elif action == "pre_clear":
+        instance._facet_tag_ids = list(instance.tags.values_list("pk", flat=True))
+    elif action == "post_clear":
+        refresh_tag_facets(getattr(instance, "_facet_tag_ids", []))
+    elif action in ("post_add", "post_remove"):
+        refresh_tag_facets(pk_set or [])
+
+
+@receiver(post_save, sender=Event)
+def update_tag_facets_on_event(sender, instance, created, raw=False, **kwargs):
+    # theme, scale or publication status may have changed
+    if not created and not raw:
+        refresh_contribution_facets(Contribution.objects.filter(event=instance).values("pk"))
+
+
+@receiver(post_save, sender=Tag)
+def update_tag_facets_on_tag_rename(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        if ContributionTagFacet.objects.filter(tag=instance).update(slug=instance.slug, name=instance.name):
+            tag_facets.invalidate()
+
+
+@receiver(post_delete, sender=Tag)
+def update_tag_facets_on_tag_delete(sender, instance, **kwargs):
+    tag_facets.invalidate()
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event_counts(sender, raw=False, **kwargs):
+    if not raw:
+        bump_generation("events")
+
+
+@receiver(post_save, sender=Contribution)
+@receiver(post_delete, sender=Contribution)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=ContributionStatus)
+@receiver(post_delete, sender=ContributionStatus)
+@receiver(m2m_changed, sender=Contribution.tags.through)
+def invalidate_contribution_counts(sender, raw=False, action=None, **kwargs):
+    if not raw and action in (None, "post_add", "post_remove", "post_clear"):
+        bump_generation("contributions")
+
+
+def touch_contributions(contributions):
+    """Bump updated_at, which versions the cached contribution cards"""
+    Contribution.objects.filter(pk__in=contributions).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Contribution.tags.through)
+def touch_contributions_on_tags(sender, instance, action, pk_set=None, **kwargs):
+    if isinstance(instance, Contribution):
+        if action in ("post_add", "post_remove", "post_clear"):
+            touch_contributions([instance.pk])
+    elif action in ("post_add", "post_remove"):
+        touch_contributions(pk_set or [])
+    elif action == "pre_clear":
+        touch_contributions(Contribution.objects.filter(tags=instance).values("pk"))
+
+
+@receiver(post_save, sender=Tag)
+def touch_contributions_on_tag_rename(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        touch_contributions(Contribution.objects.filter(tags=instance).values("pk"))
+
+
+@receiver(pre_delete, sender=Tag)
+def touch_contributions_on_tag_delete(sender, instance, **kwargs):
+    touch_contributions(Contribution.objects.filter(tags=instance).values("pk"))
+
+
+@receiver(post_delete, sender=ContributionStatus)
+def update_current_status_on_status_delete(sender, instance, **kwargs):
+    # the deleted status may have been the current one: fall back on the newest remaining, as ContributionStatus.save
+    newest = ContributionStatus.objects.filter(contribution=OuterRef("pk")).order_by("-pk").values("pk")[:1]
+    Contribution.objects.filter(pk=instance.contribution_id).update(
+        current_status=Subquery(newest), updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=Contribution)
+@receiver(post_delete, sender=Booking)
+@receiver(post_delete, sender=Contribution)
+def count_writes(sender, signal, created=False, raw=False, **kwargs):
+    if not raw:
+        action = "deleted" if signal is post_delete else "created" if created else "updated"
+        MODEL_WRITES.labels(sender._meta.model_name, action).inc()
+
+
+def purge_contributions(contributions):
+    """Purge the public pages showing the contributions from the edge cache"""
+    if not settings.EDGE_PURGE_URL:
+        return
+    keys = ["contribution-list"]
+    for pk, event_id in Contribution.objects.filter(pk__in=contributions).values_list("pk", "event_id"):
+        keys += [f"contribution-{pk}", f"event-{event_id}"]
+    purge(keys)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def purge_event(sender, instance, raw=False, **kwargs):
+    # the contribution pages show their event, and are tagged with its key
+    if not raw:
+        purge([f"event-{instance.pk}", "event-list", "contribution-list"])
+
+
+@receiver(post_save, sender=Contribution)
+@receiver(post_delete, sender=Contribution)
+def purge_contribution(sender, instance, raw=False, **kwargs):
+    if not raw:
+        purge([f"contribution-{instance.pk}", f"event-{instance.event_id}", "contribution-list"])
+
+
+@receiver(post_save, sender=ContributionStatus)
+@receiver(post_delete, sender=ContributionStatus)
+def purge_contribution_on_status(sender, instance, raw=False, **kwargs):
+    if not raw:
+        purge_contributions([instance.contribution_id])
+
+
+@receiver(m2m_changed, sender=Contribution.tags.through)
+def purge_contributions_on_tags(sender, instance, action, pk_set=None, **kwargs):
+    if isinstance(instance, Contribution):
+        if action in ("post_add", "post_remove", "post_clear"):
+            purge_contributions([instance.pk])
+    elif action in ("post_add", "post_remove"):
+        purge_contributions(pk_set or [])
+    elif action == "pre_clear":
+        purge_contributions(Contribution.objects.filter(tags=instance).values("pk"))
+
+
+@receiver(post_save, sender=Tag)
+def purge_contributions_on_tag_rename(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        purge_contributions(Contribution.objects.filter(tags=instance).values("pk"))
+
+
+@receiver(pre_delete, sender=Tag)
+def purge_contributions_on_tag_delete(sender, instance, **kwargs):
+    purge_contributions(Contribution.objects.filter(tags=instance).values("pk"))
+
+
+@receiver(m2m_changed, sender=Event.organizers.through)
+def invalidate_organized_events_on_organizers(sender, instance, action, pk_set=None, **kwargs):
+    if not isinstance(instance, Event):
+        # changed from the user side
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_organized_events([instance.pk])
+    elif action == "pre_clear":
+        instance._organizer_ids = list(instance.organizers.values_list("pk", flat=True))
+    elif action == "post_clear":
+        invalidate_organized_events(getattr(instance, "_organizer_ids", []))
+    elif action in ("post_add", "post_remove"):
+        invalidate_organized_events(pk_set or [])
+
+
+@receiver(pre_save, sender=Event)
+def load_event_image_derivatives(sender, instance, raw=False, **kwargs):
+    if not raw:
+        load_image_derivatives(instance)
+
+
+@receiver(post_save, sender=Event)
+def update_event_image_derivatives(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_image_derivatives(instance)
+
+
+@receiver(post_delete, sender=Event)
+def delete_event_image_derivatives(sender, instance, **kwargs):
+    delete_image_derivatives(instance)
@@ -0,0 +1,18 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from event.factories import EventFactory
+from signup.factories import EmailBasedUserFactory
+
+
+class EventAdminTest(TestCase):
+    def test_search_is_fuzzy_across_fields(self):
+        by_city = EventFactory(city="Strasbourg", subject="Atelier")
+        by_place = EventFactory(place_name="Médiathèque de Strasbourg", city="Colmar", subject="Débat")
+        other = EventFactory(city="Brest", place_name="Mairie", subject="Réunion publique")
+
+        self.client.force_login(EmailBasedUserFactory(is_staff=True, is_superuser=True))
+        response = self.client.get(reverse("admin:event_event_changelist"), {"q": "strasbourgg"})
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(response.context["cl"].result_list, [by_city, by_place])
+        self.assertNotIn(other, response.context["cl"].result_list)
@@ -0,0 +1,52 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+
+class BenchmarkViewsCommandTest(TestCase):
+    def setUp(self):
+        call_command(
+            "seed_scale",
+            *("--users", "10", "--events", "3", "--bookings", "12", "--contributions", "6", "--tags", "3"),
+            stdout=io.StringIO(),
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, "benchmark.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def benchmark(self, *args):
+        call_command(
+            "benchmark_views",
+            *("--iterations", "2", "--warmup", "1", "--output", self.output),
+            *args,
+            stdout=io.StringIO(),
+            stderr=io.StringIO(),
+        )
+        with open(self.output) as report_file:
+            return json.load(report_file)
+
+    def test_report(self):
+        report = self.benchmark()
+        self.assertEqual(report["dataset"]["events"], 3)
+        self.assertIn("event_organizer_event_participants_export", report["views"])
+        for name, results in report["views"].items():
+            self.assertEqual(results["status"], 200, name)
+            self.assertGreater(results["queries"], 0, name)
+            self.assertLessEqual(results["p50_ms"], results["p99_ms"], name)
+
+    def test_regression_against_baseline(self):
+        report = self.benchmark("--view", "event_list")
+        self.assertEqual(list(report["views"]), ["event_list"])
+        baseline = os.path.join(self.directory.name, "baseline.json")
+        report["views"]["event_list"]["queries"] -= 1
+        with open(baseline, "w") as baseline_file:
+            json.dump(report, baseline_file)
+
+        with self.assertRaisesMessage(CommandError, "1 régression(s)"):
+            self.benchmark("--view", "event_list", "--baseline", baseline, "--threshold", "1000")
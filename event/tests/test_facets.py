@@ -0,0 +1,86 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from taggit.models import Tag
+
+from event.facets import get_tag_choices, get_tag_facets, refresh_tag_facets
+from event.factories import ContributionFactory, EventFactory
+from event.models import Contribution, ContributionTagFacet, Event
+
+
+class TagFacetTest(TestCase):
+    def setUp(self):
+        self.event = EventFactory(pub_status=Event.PubStatus.PUB, theme=Event.Theme.SANTE, scale=Event.Scale.LOC)
+        self.other_event = EventFactory(
+            pub_status=Event.PubStatus.PUB, theme=Event.Theme.BIODIV, scale=Event.Scale.NAT
+        )
+
+    def get_counts(self):
+        return {slug: facet.counts for slug, facet in get_tag_facets().items()}
+
+    def test_counts_public_contributions_by_theme_and_scale(self):
+        ContributionFactory.create_batch(2, event=self.event, public=True, tags=["eau", "air"])
+        ContributionFactory(event=self.other_event, public=True, tags=["eau"])
+        ContributionFactory(event=self.other_event, public=False, tags=["sol"])
+        ContributionFactory(event__pub_status=Event.PubStatus.UNPUB, public=True, tags=["sol"])
+
+        self.assertEqual(
+            self.get_counts(),
+            {
+                "eau": {(Event.Theme.SANTE, Event.Scale.LOC): 2, (Event.Theme.BIODIV, Event.Scale.NAT): 1},
+                "air": {(Event.Theme.SANTE, Event.Scale.LOC): 2},
+            },
+        )
+        self.assertEqual(get_tag_choices(), [("air", "air (2)"), ("eau", "eau (3)")])
+        self.assertEqual(get_tag_choices(theme=Event.Theme.BIODIV), [("eau", "eau (1)")])
+        self.assertEqual(get_tag_choices(theme=Event.Theme.BIODIV, scale=Event.Scale.LOC), [])
+
+    def test_facets_follow_changes(self):
+        contribution = ContributionFactory(event=self.event, public=True, tags=["eau"])
+        self.assertEqual(self.get_counts(), {"eau": {(Event.Theme.SANTE, Event.Scale.LOC): 1}})
+
+        contribution.tags.add("air")
+        contribution.tags.remove("eau")
+        self.assertEqual(self.get_counts(), {"air": {(Event.Theme.SANTE, Event.Scale.LOC): 1}})
+
+        self.event.scale = Event.Scale.REG
+        self.event.save()
+        self.assertEqual(self.get_counts(), {"air": {(Event.Theme.SANTE, Event.Scale.REG): 1}})
+
+        Tag.objects.filter(slug="air").update(name="Air")
+        tag = Tag.objects.get(slug="air")
+        tag.name = "Qualité de l'air"
+        tag.save()
+        self.assertEqual(get_tag_choices(), [("air", "Qualité de l'air (1)")])
+
+        contribution.public = False
+        contribution.save()
+        self.assertEqual(self.get_counts(), {})
+
+        contribution.public = True
+        contribution.save()
+        contribution.tags.clear()
+        self.assertEqual(self.get_counts(), {})
+
+        contribution.tags.add("eau")
+        contribution.delete()
+        self.assertEqual(self.get_counts(), {})
+
+    def test_refresh_command(self):
+        ContributionFactory(event=self.event, public=True, tags=["eau"])
+        ContributionTagFacet.objects.all().delete()
+
+        call_command("refresh_tag_facets", stdout=io.StringIO())
+        self.assertEqual(self.get_counts(), {"eau": {(Event.Theme.SANTE, Event.Scale.LOC): 1}})
+
+    def test_refresh_updates_the_facets_in_place(self):
+        contribution = ContributionFactory(event=self.event, public=True, tags=["eau"])
+        ContributionFactory(event=self.other_event, public=True, tags=["eau"])
+        kept = ContributionTagFacet.objects.get(theme=Event.Theme.BIODIV)
+        # the count written by a concurrent refresh is overwritten, not inserted again
+        ContributionTagFacet.objects.filter(pk=kept.pk).update(count=5)
+
+        Contribution.objects.filter(pk=contribution.pk).delete()
+        refresh_tag_facets(None)
+        self.assertEqual(list(ContributionTagFacet.objects.values_list("pk", "count")), [(kept.pk, 1)])
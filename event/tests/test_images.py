@@ -0,0 +1,115 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from event.factories import EventFactory
+from event.models import Event
+
+
+def make_image(width, height, format="JPEG", mode="RGB"):
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height), "teal").save(buffer, format)
+    return ContentFile(buffer.getvalue())
+
+
+class ImageDerivativesTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        storage_settings = override_settings(
+            DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage",
+            MEDIA_ROOT=self.media_root,
+            MEDIA_URL="/media/",
+        )
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+        self.event = EventFactory(pub_status=Event.PubStatus.PUB)
+
+    def set_image(self, content, name="photo.jpg"):
+        with self.captureOnCommitCallbacks(execute=True):
+            if content is None:
+                self.event.image = None
+                self.event.save()
+            else:
+                self.event.image.save(name, content)
+        self.event.refresh_from_db()
+
+    def test_derivatives_are_generated_on_upload(self):
+        self.set_image(make_image(1600, 900))
+        self.assertEqual((self.event.image_width, self.event.image_height), (1600, 900))
+        self.assertEqual(self.event.image_derivatives["source"], self.event.image.name)
+        self.assertEqual(
+            sorted(int(width) for width in self.event.image_derivatives if width != "source"), [320, 640, 960, 1280]
+        )
+        with default_storage.open(self.event.image_derivatives["640"]) as file, Image.open(file) as image:
+            self.assertEqual((image.format, image.size), ("WEBP", (640, 360)))
+
+    def test_derivatives_are_replaced_with_the_image(self):
+        self.set_image(make_image(1600, 900))
+        previous = [name for width, name in self.event.image_derivatives.items() if width != "source"]
+
+        # never enlarged
+        self.set_image(make_image(500, 500, "PNG", "P"), "logo.png")
+        self.assertEqual(set(self.event.image_derivatives), {"source", "320"})
+        self.assertTrue(default_storage.exists(self.event.image_derivatives["320"]))
+        self.assertFalse([name for name in previous if default_storage.exists(name)])
+
+        derivative = self.event.image_derivatives["320"]
+        self.set_image(None)
+        self.assertEqual(self.event.image_derivatives, {})
+        self.assertIsNone(self.event.image_width)
+        self.assertFalse(default_storage.exists(derivative))
+
+    def test_derivatives_are_deleted_with_the_event(self):
+        self.set_image(make_image(800, 600))
+        names = [name for width, name in self.event.image_derivatives.items() if width != "source"]
+        self.assertTrue(names)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.delete()
+        self.assertFalse([name for name in names if default_storage.exists(name)])
+
+    def test_stale_instance_replaces_the_stored_derivatives(self):
+        stale = Event.objects.get(pk=self.event.pk)
+        self.set_image(make_image(800, 600))
+        previous = [name for width, name in self.event.image_derivatives.items() if width != "source"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stale.image.save("other.jpg", make_image(700, 500))
+        self.assertFalse([name for name in previous if default_storage.exists(name)])
+
+    def test_unreadable_image_is_not_processed_again(self):
+        with self.assertLogs("event.images", "WARNING"):
+            self.set_image(ContentFile(b"not an image"))
+        self.assertEqual(self.event.image_derivatives, {"source": self.event.image.name})
+
+        with self.assertNoLogs("event.images"), self.captureOnCommitCallbacks(execute=True):
+            self.event.save()
+
+    def test_cards_use_the_derivatives(self):
+        self.set_image(make_image(1600, 900))
+        response = self.client.get(reverse("event_list"))
+        url = default_storage.url(self.event.image_derivatives["320"])
+        self.assertContains(response, f"{url} 320w")
+        self.assertContains(response, f"{self.event.image.url} 1600w")
+        self.assertContains(response, 'width="1600" height="900"')
+
+    def test_command_generates_the_missing_derivatives(self):
+        name = default_storage.save("images/old.jpg", make_image(800, 600))
+        Event.objects.filter(pk=self.event.pk).update(image=name)
+
+        stdout = io.StringIO()
+        call_command("generate_image_derivatives", stdout=stdout)
+        self.event.refresh_from_db()
+        self.assertEqual(set(self.event.image_derivatives), {"source", "320", "640"})
+        self.assertIn("1 image(s)", stdout.getvalue())
+
+        call_command("generate_image_derivatives", stdout=stdout)
+        self.assertIn("0 image(s)", stdout.getvalue())
@@ -0,0 +1,50 @@
+import datetime
+import importlib
+import io
+
+from django.apps import apps
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from event.factories import ContributionFactory, ContributionStatusFactory, EventFactory
+from event.models import Contribution, Event
+
+
+class ContributionStatusBackfillTest(TestCase):
+    def test_backfill_command(self):
+        statuses = ContributionStatusFactory.create_batch(3)
+        other_status = ContributionStatusFactory(contribution=statuses[0].contribution)
+        Contribution.objects.update(current_status=None)
+
+        call_command("backfill_contribution_status", "--batch-size", "2", stdout=io.StringIO())
+        self.assertEqual(
+            dict(Contribution.objects.values_list("pk", "current_status")),
+            {
+                statuses[0].contribution_id: other_status.pk,
+                statuses[1].contribution_id: statuses[1].pk,
+                statuses[2].contribution_id: statuses[2].pk,
+            },
+        )
+
+
+class UpdatedAtBackfillTest(TestCase):
+    def test_rows_are_dated_from_their_history(self):
+        past_event = EventFactory(start=timezone.now() - datetime.timedelta(days=30))
+        future_event = EventFactory(start=timezone.now() + datetime.timedelta(days=30))
+        contribution = ContributionFactory(event=past_event)
+        ContributionStatusFactory(contribution=contribution, change_on=datetime.date(2023, 3, 1))
+        ContributionStatusFactory(contribution=contribution, change_on=datetime.date(2023, 5, 1))
+        without_status = ContributionFactory(event=past_event)
+
+        migration = importlib.import_module("event.migrations.0021_updated_at")
+        migration._backfill_updated_at(apps, None)
+
+        past_event.refresh_from_db()
+        self.assertEqual(past_event.updated_at, past_event.start)
+        self.assertLessEqual(Event.objects.get(pk=future_event.pk).updated_at, timezone.now())
+        self.assertEqual(
+            Contribution.objects.get(pk=contribution.pk).updated_at,
+            datetime.datetime(2023, 5, 1, tzinfo=datetime.timezone.utc),
+        )
+        self.assertEqual(Contribution.objects.get(pk=without_status.pk).updated_at, past_event.start)
@@ -0,0 +1,79 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from event.factories import ContributionFactory, ContributionStatusFactory
+from event.models import Booking, Contribution, ContributionStatus, Event
+from signup.models import EmailBasedUser
+
+
+class ContributionCurrentStatusTest(TestCase):
+    def test_current_status_follows_appended_statuses(self):
+        contribution = ContributionFactory()
+        self.assertIsNone(contribution.current_status)
+
+        first = ContributionStatusFactory(contribution=contribution, status=ContributionStatus.Status.STUDY)
+        self.assertEqual(contribution.current_status, first)
+        last = ContributionStatusFactory(contribution=contribution, status=ContributionStatus.Status.SELECT)
+        self.assertEqual(Contribution.objects.get(pk=contribution.pk).current_status, last)
+
+        # saving an older status again does not make it current
+        first.save()
+        self.assertEqual(Contribution.objects.get(pk=contribution.pk).current_status, last)
+
+    def test_current_status_falls_back_when_deleted(self):
+        contribution = ContributionFactory()
+        first = ContributionStatusFactory(contribution=contribution, status=ContributionStatus.Status.STUDY)
+        last = ContributionStatusFactory(contribution=contribution, status=ContributionStatus.Status.SELECT)
+        before = Contribution.objects.get(pk=contribution.pk).updated_at
+
+        last.delete()
+        contribution.refresh_from_db()
+        self.assertEqual(contribution.current_status, first)
+        self.assertGreater(contribution.updated_at, before)
+
+        first.delete()
+        contribution.refresh_from_db()
+        self.assertIsNone(contribution.current_status)
+
+
+class SeedScaleCommandTest(TestCase):
+    def seed(self, *args):
+        call_command(
+            "seed_scale",
+            *("--users", "5", "--events", "3", "--bookings", "20", "--contributions", "10", "--tags", "4"),
+            *args,
+            stdout=io.StringIO(),
+        )
+
+    def test_seed_scale(self):
+        self.seed("--seed", "1")
+        self.assertEqual(Event.objects.count(), 3)
+        # capped to the number of (event, participant) pairs
+        self.assertEqual(Booking.objects.count(), 15)
+        self.assertEqual(Contribution.objects.count(), 10)
+        self.assertEqual(Contribution.tags.through.objects.count(), 30)
+        self.assertFalse(Event.objects.filter(organizers=None).exists())
+        for contribution in Contribution.objects.filter(contribution_evolution__isnull=False).distinct():
+            self.assertEqual(contribution.current_status, contribution.contribution_evolution.order_by("pk").last())
+        self.assertFalse(Contribution.objects.filter(search_vector=None).exists())
+
+    def get_seeded_data(self):
+        return (
+            list(Contribution.objects.order_by("pk").values_list("title", flat=True)),
+            list(Event.objects.order_by("pk").values_list("start", "end")),
+            list(Booking.objects.order_by("pk").values_list("confirmed_on", "cancelled_on")),
+            list(ContributionStatus.objects.order_by("pk").values_list("status", "change_on")),
+        )
+
+    def test_seed_scale_is_deterministic(self):
+        self.seed("--seed", "1")
+        data = self.get_seeded_data()
+        self.seed("--seed", "1", "--clear")
+        self.assertEqual(self.get_seeded_data(), data)
+        self.assertEqual(EmailBasedUser.objects.count(), 5)
+        self.assertFalse(Contribution.tags.through.objects.exclude(tag__slug__startswith="seed-").exists())
+
+        self.seed("--seed", "1", "--clear", "--now", "2030-06-01")
+        self.assertGreater(Event.objects.earliest("start").start.year, 2028)
@@ -0,0 +1,213 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from event import urls as event_urls
+from event.factories import ContributionFactory, ContributionStatusFactory, EventFactory
+from event.models import Booking, Event, EventExport
+from event.permissions import get_organized_event_ids
+from signup import urls as signup_urls
+from signup.factories import EmailBasedUserFactory
+
+
+# maximum number of queries of each page (session lookup excluded), whatever the volume of data
+QUERY_BUDGETS = {
+    "home": 0,
+    "login": 1,
+    "profile": 2,
+    "signup": 1,
+    "event_list": 4,
+    "event_detail": 10,
+    "contribution_list": 6,
+    "contribution_detail": 4,
+    "event_registration": 3,
+    "event_registration_delete": 5,
+    "event_organizer_dashboard": 3,
+    "event_organizer_event_create": 2,
+    "event_organizer_event_detail": 8,
+    "event_organizer_event_update": 3,
+    "event_organizer_event_participants_export": 3,
+    "event_organizer_event_export": 9,
+    "event_organizer_export_status": 3,
+    "event_organizer_export_download": 2,
+    "event_organizer_registration_accept": 10,
+    "event_organizer_registration_decline": 10,
+    "event_organizer_registration_bulk": 12,
+    "event_organizer_contribution_create": 3,
+    "event_organizer_contribution_update": 4,
+    "event_organizer_event_add_organizer": 3,
+}
+
+
+class QueryBudgetTest(TestCase):
+    """
+    Render every page of the event and signup apps with a small and a 50 times bigger data set:
+    the number of queries must not depend on the volume (no N+1) and must stay within its budget.
+    """
+
+    def setUp(self):
+        self.organizer = EmailBasedUserFactory(is_organizer=True)
+        self.participant = EmailBasedUserFactory(is_organizer=False)
+        self.event = EventFactory(owner=self.organizer, pub_status=Event.PubStatus.PUB, upcoming=True)
+        self.contribution = ContributionFactory(event=self.event, public=True, tags=["climat"])
+        self.booking = Booking.objects.create(event=self.event, participant=self.participant)
+        self.export = EventExport.objects.create(event=self.event, requested_by=self.organizer, fingerprint="test")
+
+    def grow(self, count):
+        """Add `count` of each kind of object shown in the pages"""
+        for index in range(count):
+            Booking.objects.create(event=self.event, participant=EmailBasedUserFactory())
+            contribution = ContributionFactory(event=self.event, public=True, tags=[f"tag{index}", "climat"])
+            ContributionStatusFactory(contribution=contribution)
+            self.event.organizers.add(EmailBasedUserFactory(is_organizer=True))
+            EventFactory(pub_status=Event.PubStatus.PUB, organizers=[self.organizer])
+
+    def get_pending_booking(self):
+        return Booking.objects.create(event=self.event, participant=EmailBasedUserFactory())
+
+    def get_requests(self):
+        """(url name, user, method, url, data) of each page"""
+        event, organizer, participant = self.event, self.organizer, self.participant
+        return [
+            ("home", None, "get", reverse("home"), {}),
+            ("login", None, "get", reverse("login"), {}),
+            ("profile", participant, "get", reverse("profile"), {}),
+            ("signup", None, "get", reverse("signup"), {}),
+            ("event_list", None, "get", reverse("event_list"), {}),
+            ("event_detail", participant, "get", reverse("event_detail", args=[event.pk]), {}),
+            ("contribution_list", None, "get", reverse("contribution_list"), {"tag": "climat"}),
+            ("contribution_detail", None, "get", reverse("contribution_detail", args=[self.contribution.pk]), {}),
+            ("event_registration", EmailBasedUserFactory(), "get", reverse("event_registration", args=[event.pk]), {}),
+            (
+                "event_registration_delete",
+                participant,
+                "get",
+                reverse("event_registration_delete", args=[self.booking.pk]),
+                {},
+            ),
+            ("event_organizer_dashboard", organizer, "get", reverse("event_organizer_dashboard"), {}),
+            ("event_organizer_event_create", organizer, "get", reverse("event_organizer_event_create"), {}),
+            (
+                "event_organizer_event_detail",
+                organizer,
+                "get",
+                reverse("event_organizer_event_detail", args=[event.pk]),
+                {},
+            ),
+            (
+                "event_organizer_event_update",
+                organizer,
+                "get",
+                reverse("event_organizer_event_update", args=[event.pk]),
+                {},
+            ),
+            (
+                "event_organizer_event_participants_export",
+                organizer,
+                "get",
+                reverse("event_organizer_event_participants_export", args=[event.pk]),
+                {},
+            ),
+            (
+                "event_organizer_event_export",
+                organizer,
+                "post",
+                reverse("event_organizer_event_export", args=[event.pk]),
+                {},
+            ),
+            (
+                "event_organizer_export_status",
+                organizer,
+                "get",
+                reverse("event_organizer_export_status", args=[self.export.pk]),
+                {},
+            ),
+            (
+                "event_organizer_export_download",
+                organizer,
+                "get",
+                reverse("event_organizer_export_download", args=[self.export.pk]),
+                {},
+            ),
+            (
+                "event_organizer_registration_accept",
+                organizer,
+                "post",
+                reverse("event_organizer_registration_accept", args=[self.get_pending_booking().pk]),
+                {},
+            ),
+            (
+                "event_organizer_registration_decline",
+                organizer,
+                "post",
+                reverse("event_organizer_registration_decline", args=[self.get_pending_booking().pk]),
+                {},
+            ),
+            (
+                "event_organizer_registration_bulk",
+                organizer,
+                "post",
+                reverse("event_organizer_registration_bulk", args=[event.pk]),
+                {"action": "accept", "all_pending": "on"},
+            ),
+            (
+                "event_organizer_contribution_create",
+                organizer,
+                "get",
+                reverse("event_organizer_contribution_create", args=[event.pk]),
+                {},
+            ),
+            (
+                "event_organizer_contribution_update",
+                organizer,
+                "get",
+                reverse("event_organizer_contribution_update", args=[self.contribution.pk]),
+                {},
+            ),
+            (
+                "event_organizer_event_add_organizer",
+                organizer,
+                "get",
+                reverse("event_organizer_event_add_organizer", args=[event.pk]),
+                {},
+            ),
+        ]
+
+    def measure(self):
+        counts = {}
+        for name, user, method, url, data in self.get_requests():
+            if user is None:
+                self.client.logout()
+            else:
+                self.client.force_login(user)
+            # cold caches, so that both volumes are measured the same way,
+            # except the organized events cached per user like the session
+            for cache in caches.all():
+                cache.clear()
+            if user is not None:
+                get_organized_event_ids(user)
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(self.client, method)(url, data)
+                if hasattr(response, "streaming_content"):
+                    b"".join(response.streaming_content)
+            self.assertLess(response.status_code, 500, name)
+            # the session and user lookups are the same for every page
+            counts[name] = len([query for query in queries if "django_session" not in query["sql"]])
+        return counts
+
+    def test_every_url_has_a_budget(self):
+        names = {pattern.name for pattern in event_urls.urlpatterns + signup_urls.urlpatterns}
+        self.assertEqual(names, set(QUERY_BUDGETS))
+
+    def test_query_counts_do_not_grow_with_data(self):
+        self.grow(1)
+        small = self.measure()
+        self.grow(49)
+        large = self.measure()
+
+        for name, budget in QUERY_BUDGETS.items():
+            with self.subTest(name):
+                self.assertEqual(large[name], small[name], f"{name} queries grow with the data")
+                self.assertLessEqual(large[name], budget, f"{name} exceeds its query budget")
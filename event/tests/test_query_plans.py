@@ -0,0 +1,120 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from event.models import Booking, Contribution, Event
+from signup.factories import EmailBasedUserFactory
+
+
+EVENTS = 3000
+CONTRIBUTIONS_PER_EVENT = 3
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are PostgreSQL specific")
+class QueryPlanTest(TestCase):
+    """
+    The main query of each list view must use an index at a realistic volume,
+    so that a dropped index or a new query shape fails here rather than in production.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = EmailBasedUserFactory(is_organizer=True)
+        participants = [EmailBasedUserFactory() for _ in range(5)]
+        themes, scales = Event.Theme.values, Event.Scale.values
+        pub_statuses = [Event.PubStatus.PUB, Event.PubStatus.PUB, Event.PubStatus.PRIV, Event.PubStatus.UNPUB]
+        first_start = datetime.now(timezone.utc) - timedelta(days=EVENTS // 2)
+
+        events = Event.objects.bulk_create(
+            Event(
+                owner=cls.organizer,
+                pub_status=pub_statuses[index % len(pub_statuses)],
+                theme=themes[index % len(themes)],
+                scale=scales[index % len(scales)],
+                subject=f"Concertation {index}",
+                start=first_start + timedelta(days=index),
+                end=first_start + timedelta(days=index, hours=3),
+                address="1 rue de la Paix",
+                zip_code=f"{index % 95 + 1:02d}000",
+                city=f"Ville {index % 500}",
+                booking_online=True,
+                participant_help=False,
+            )
+            for index in range(EVENTS)
+        )
+        Contribution.objects.bulk_create(
+            Contribution(
+                event=event,
+                kind=Contribution.Kind.IDEA,
+                title=f"Contribution {event.pk}-{index}",
+                description="Une contribution",
+                public=bool(index % 2),
+            )
+            for event in events
+            for index in range(CONTRIBUTIONS_PER_EVENT)
+        )
+        Booking.objects.bulk_create(
+            Booking(event=event, participant=participant)
+            for event in events[::3] + [events[-1]]
+            for participant in participants
+        )
+        # each participant organises a few events, the organizer only the last one
+        Event.organizers.through.objects.bulk_create(
+            Event.organizers.through(event=event, emailbaseduser=participants[index % len(participants)])
+            for index, event in enumerate(events[:-1])
+        )
+        cls.event = events[-1]
+        cls.event.organizers.add(cls.organizer)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE event_event, event_contribution, event_booking, event_event_organizers")
+
+    def get_plan(self, url, table, params=None):
+        """EXPLAIN of the first query of the page selecting rows from `table`"""
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url, params).status_code, 200)
+        sql = next(
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith("SELECT") and "COUNT(" not in query["sql"] and f'FROM "{table}"' in query["sql"]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}")
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def assertUsesIndex(self, plan, index):
+        self.assertIn(index, plan, plan)
+
+    def test_event_list(self):
+        url = reverse("event_list")
+        self.assertUsesIndex(self.get_plan(url, "event_event"), "event_public_order_idx")
+        self.assertUsesIndex(self.get_plan(url, "event_event", {"upcoming": "on"}), "event_public_order_idx")
+        self.assertUsesIndex(
+            self.get_plan(url, "event_event", {"theme": Event.Theme.SANTE, "scale": Event.Scale.NAT}),
+            "event_public_order_idx",
+        )
+
+    def test_contribution_list(self):
+        plan = self.get_plan(reverse("contribution_list"), "event_contribution")
+        self.assertUsesIndex(plan, "event_contribution_public_idx")
+        self.assertNotIn("Seq Scan on event_event", plan)
+
+    def test_event_detail_booking(self):
+        self.client.force_login(Booking.objects.filter(event=self.event).first().participant)
+        plan = self.get_plan(reverse("event_detail", kwargs={"pk": self.event.pk}), "event_booking")
+        self.assertUsesIndex(plan, "event_booking_event_id_participant_id")
+
+    def test_organizer_pages(self):
+        self.client.force_login(self.organizer)
+        # the organized events are looked up once, then cached
+        cache.clear()
+        plan = self.get_plan(reverse("event_organizer_dashboard"), "event_event")
+        self.assertUsesIndex(plan, "event_event_organizers_emailbaseduser_id_c1fb9d3c")
+        plan = self.get_plan(reverse("event_organizer_dashboard"), "event_event")
+        self.assertUsesIndex(plan, "event_event_pkey")
+        plan = self.get_plan(reverse("event_organizer_event_detail", kwargs={"pk": self.event.pk}), "event_booking")
+        self.assertIn("Index", plan, plan)
@@ -1,13 +1,23 @@
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+
 import httpx
 import respx
 from django.conf import settings
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from faker import Faker
 
 from event.factories import BookingFactory, ContributionFactory, ContributionStatusFactory, EventFactory
-from event.models import Contribution, ContributionStatus, Event
+from event.models import Booking, Contribution, ContributionStatus, Event, EventExport
 from signup.factories import EmailBasedUserFactory
+from utils.models import OutgoingEmail
 
 
 faker = Faker("fr_FR")
@@ -63,6 +73,12 @@ class EventDetailViewTest(TestCase):
         self.assertContains(response, booking.participant.first_name)
         self.assertContains(response, booking.participant.last_name)
         self.assertContains(response, "Confirmée le ")
+        self.assertTrue(
+            OutgoingEmail.objects.filter(
+                dedup_key__startswith=f"booking-{booking.pk}-accepted-",
+                template_id=settings.BREVO_PARTICIPATION_ACCEPTED_TEMPLATE,
+            ).exists()
+        )
 
         response = self.client.get(self.url)
         self.assertContains(response, booking.participant.first_name)
@@ -83,12 +99,97 @@ class EventDetailViewTest(TestCase):
         self.assertContains(response, booking.participant.first_name)
         self.assertContains(response, booking.participant.last_name)
         self.assertContains(response, "Déclinée le ")
+        self.assertTrue(
+            OutgoingEmail.objects.filter(
+                dedup_key__startswith=f"booking-{booking.pk}-declined-",
+                template_id=settings.BREVO_PARTICIPATION_DECLINE_TEMPLATE,
+            ).exists()
+        )
 
         response = self.client.get(self.url)
         self.assertContains(response, booking.participant.first_name)
         self.assertContains(response, booking.participant.last_name)
         self.assertContains(response, "Déclinée le ")
 
+    @respx.mock
+    def test_each_transition_notifies_the_participant(self):
+        booking = BookingFactory(event=self.event)
+        self.client.force_login(self.event.owner)
+        accept_url = reverse("event_organizer_registration_accept", kwargs={"pk": booking.pk})
+        decline_url = reverse("event_organizer_registration_decline", kwargs={"pk": booking.pk})
+        for url in (accept_url, decline_url, accept_url):
+            self.client.post(url)
+        self.assertEqual(
+            list(OutgoingEmail.objects.order_by("pk").values_list("template_id", flat=True)),
+            [
+                settings.BREVO_PARTICIPATION_ACCEPTED_TEMPLATE,
+                settings.BREVO_PARTICIPATION_DECLINE_TEMPLATE,
+                settings.BREVO_PARTICIPATION_ACCEPTED_TEMPLATE,
+            ],
+        )
+
+
+class EventRegistrationBulkViewTest(TestCase):
+    def setUp(self):
+        self.event = EventFactory()
+        self.bookings = BookingFactory.create_batch(5, event=self.event)
+        self.confirmed_booking = BookingFactory(event=self.event, confirmed=True)
+        self.url = reverse("event_organizer_registration_bulk", kwargs={"pk": self.event.pk})
+        self.client.force_login(self.event.owner)
+
+    def test_other_organizer_cannot_bulk_accept(self):
+        self.client.force_login(EmailBasedUserFactory(is_organizer=True))
+        response = self.client.post(self.url, {"action": "accept", "all_pending": "1"})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Booking.objects.filter(confirmed_on__isnull=False).count(), 1)
+
+    def test_invalid_action(self):
+        response = self.client.post(self.url, {"action": "delete", "all_pending": "1"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_accept_selected_bookings(self):
+        selected = self.bookings[:3]
+        response = self.client.post(
+            self.url,
+            {"action": "accept", "booking": [booking.pk for booking in selected] + [self.confirmed_booking.pk]},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<tbody id="booking-rows">')
+        self.assertContains(response, "Confirmée le ", count=4)
+        self.assertContains(response, "En attente de confirmation", count=2)
+
+        confirmed = Booking.objects.filter(confirmed_on__isnull=False).values_list("pk", flat=True)
+        self.assertCountEqual(confirmed, [booking.pk for booking in selected] + [self.confirmed_booking.pk])
+
+        # one batched email for the 3 newly accepted participants
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.template_id, settings.BREVO_PARTICIPATION_ACCEPTED_TEMPLATE)
+        self.assertCountEqual(
+            [version["to"][0]["email"] for version in email.message_versions],
+            [booking.participant.email for booking in selected],
+        )
+        self.assertEqual(email.message_versions[0]["params"], {"event_subject": self.event.subject})
+
+    def test_bulk_decline_all_pending(self):
+        response = self.client.post(self.url, {"action": "decline", "all_pending": "1"})
+        self.assertContains(response, "Déclinée le ", count=5)
+        self.assertEqual(Booking.objects.filter(cancelled_by=self.event.owner).count(), 5)
+        self.assertEqual(len(OutgoingEmail.objects.get().message_versions), 5)
+
+        # nothing left to decline
+        response = self.client.post(self.url, {"action": "decline", "all_pending": "1"})
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+
+    def test_bulk_accept_query_count_does_not_depend_on_bookings(self):
+        # session, user, organized events (then cached), event, locked participants, update,
+        # outbox get_or_create, site config, rows
+        with self.assertNumQueries(14):
+            self.client.post(self.url, {"action": "accept", "all_pending": "1"})
+
+        BookingFactory.create_batch(20, event=self.event)
+        with self.assertNumQueries(13):
+            self.client.post(self.url, {"action": "accept", "all_pending": "1"})
+
 
 class EventCreateViewTest(TestCase):
     def setUp(self):
@@ -211,9 +312,133 @@ class EventParticipantsExportViewTest(TestCase):
         self.assertIn("attachment; filename=", response["Content-Disposition"])
 
         # Test CSV file content
-        content_lines = response.content.decode().split("\r\n")
+        self.assertTrue(response.streaming)
+        content_lines = b"".join(response.streaming_content).decode().split("\r\n")
         self.assertEqual(content_lines[0], '"Prénom","Nom","Email","Aide","Commentaire","État"')
         self.assertEqual(len(content_lines), 12)  # There is a blank line at the end
+        participant = self.bookings[0].participant
+        self.assertIn(f'"{participant.first_name}","{participant.last_name}","{participant.email}"', content_lines[1])
+
+    def test_export_participants_csv_query_count(self):
+        self.client.force_login(self.user)
+        BookingFactory(event=self.event, comment=None, confirmed=True)
+
+        # session, user, organized events (then cached), event,
+        # then a single query for all the bookings with their participant
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url)
+            content = b"".join(response.streaming_content).decode()
+        self.assertIn("Confirmée le ", content)
+
+        BookingFactory.create_batch(20, event=self.event)
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+            content_lines = b"".join(response.streaming_content).decode().split("\r\n")
+        self.assertEqual(len(content_lines), 33)
+
+
+class EventExportViewTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        storage_settings = override_settings(
+            DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage",
+            MEDIA_ROOT=self.media_root,
+            MEDIA_URL="/media/",
+        )
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+        self.event = EventFactory()
+        self.bookings = BookingFactory.create_batch(3, event=self.event)
+        self.contribution = ContributionFactory(event=self.event, tags=["climat", "école"])
+        ContributionStatusFactory(contribution=self.contribution, status=ContributionStatus.Status.STUDY)
+        ContributionStatusFactory(contribution=self.contribution, status=ContributionStatus.Status.SELECT)
+        self.url = reverse("event_organizer_event_export", kwargs={"pk": self.event.pk})
+        self.client.force_login(self.event.owner)
+
+    def test_other_organizer_cannot_export(self):
+        self.client.force_login(EmailBasedUserFactory(is_organizer=True))
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_is_built_in_background(self):
+        response = self.client.post(self.url)
+        export = EventExport.objects.get()
+        status_url = reverse("event_organizer_export_status", kwargs={"pk": export.pk})
+        download_url = reverse("event_organizer_export_download", kwargs={"pk": export.pk})
+        self.assertContains(response, "Export en cours de préparation")
+        self.assertContains(response, status_url)
+        self.assertEqual(self.client.get(download_url).status_code, 404)
+
+        call_command("process_event_exports", "--once", stdout=io.StringIO())
+
+        response = self.client.get(status_url)
+        self.assertContains(response, download_url)
+        self.assertNotContains(response, "hx-trigger")
+        response = self.client.get(download_url)
+        self.assertEqual(response.status_code, 302)
+
+        export.refresh_from_db()
+        self.assertEqual(export.status, EventExport.Status.DONE)
+        self.assertEqual(export.progress, 100)
+        with export.file.open("rb") as file, zipfile.ZipFile(io.BytesIO(file.read())) as archive:
+            self.assertCountEqual(
+                archive.namelist(),
+                ["participants.csv", "contributions.csv", "contributions.jsonl", "historique_statuts.csv"],
+            )
+            participants = archive.read("participants.csv").decode().split("\r\n")
+            self.assertEqual(len(participants), 5)  # header + 3 participants + blank line
+            history = archive.read("historique_statuts.csv").decode().split("\r\n")
+            self.assertEqual(len(history), 4)
+            contribution = json.loads(archive.read("contributions.jsonl").decode().splitlines()[0])
+            self.assertEqual(contribution["title"], self.contribution.title)
+            self.assertEqual(contribution["tags"], ["climat", "école"])
+            self.assertEqual(contribution["status"], "Retenue")
+
+    def test_unchanged_event_reuses_export(self):
+        self.client.post(self.url)
+        call_command("process_event_exports", "--once", stdout=io.StringIO())
+        self.client.post(self.url)
+        self.assertEqual(EventExport.objects.count(), 1)
+
+        # a new participant changes the event data
+        BookingFactory(event=self.event)
+        self.client.post(self.url)
+        self.assertEqual(EventExport.objects.count(), 2)
+
+        # so does an edited contribution
+        self.contribution.title = "Nouveau titre"
+        self.contribution.save()
+        self.client.post(self.url)
+        self.assertEqual(EventExport.objects.count(), 3)
+
+        # and so do the profile and the booking of a participant
+        participant = self.bookings[0].participant
+        participant.last_name = "Nouveau nom"
+        participant.save()
+        self.client.post(self.url)
+        self.assertEqual(EventExport.objects.count(), 4)
+        Booking.objects.filter(pk=self.bookings[1].pk).update(comment="Nouveau commentaire")
+        self.client.post(self.url)
+        self.assertEqual(EventExport.objects.count(), 5)
+
+    def test_abandoned_export_is_failed_and_replaced(self):
+        self.client.post(self.url)
+        export = EventExport.objects.get()
+        status_url = reverse("event_organizer_export_status", kwargs={"pk": export.pk})
+        # the worker stopped while building it
+        started_on = timezone.now() - timedelta(seconds=settings.EXPORT_RUNNING_TIMEOUT + 1)
+        EventExport.objects.filter(pk=export.pk).update(status=EventExport.Status.RUNNING, started_on=started_on)
+
+        self.client.post(self.url)
+        self.assertEqual(EventExport.objects.count(), 2)
+
+        call_command("process_event_exports", "--once", stdout=io.StringIO())
+        export.refresh_from_db()
+        self.assertEqual(export.status, EventExport.Status.FAILED)
+        self.assertNotContains(self.client.get(status_url), "hx-trigger")
+        self.assertEqual(EventExport.objects.exclude(pk=export.pk).get().status, EventExport.Status.DONE)
 
 
 class EventContributionCreateViewTest(TestCase):
@@ -427,6 +652,24 @@ class EventOrganizerAddViewTest(TestCase):
             response, "Cette adresse email n'appartient pas à un utilisateur de type organisateur.", html=True
         )
 
+    def test_organizers_changes_update_the_cached_permissions(self):
+        self.client.force_login(self.guest_user)
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
+
+        self.client.force_login(self.owner_user)
+        self.client.post(self.add_url, data={"email_organizer": self.guest_user.email})
+        self.client.force_login(self.guest_user)
+        self.assertEqual(self.client.get(self.detail_url).status_code, 200)
+
+        self.event.organizers.remove(self.guest_user)
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
+
+        self.guest_user.event_organised.add(self.event)
+        self.assertEqual(self.client.get(self.detail_url).status_code, 200)
+
+        self.event.organizers.clear()
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
+
     def test_organizer_can_add_organizer_email(self):
         self.client.force_login(self.owner_user)
         data = {
@@ -1,12 +1,19 @@
+from unittest import mock
+
 import httpx
 import respx
 from django.conf import settings
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from taggit.models import Tag
 
-from event.factories import ContributionFactory, EventFactory
-from event.models import Booking, Contribution, Event
+from event.factories import ContributionFactory, ContributionStatusFactory, EventFactory
+from event.models import Booking, Contribution, ContributionStatus, Event
 from signup.factories import EmailBasedUserFactory
+from utils.models import OutgoingEmail
+from utils.tests.stub_server import StubServer
 
 
 class EventListViewTest(TestCase):
@@ -63,6 +70,127 @@ class EventListViewTest(TestCase):
         for event in events:
             self.assertNotContains(response, event.subject, html=True)
 
+    def test_list_page_cursor_pagination(self):
+        EventFactory.create_batch(6, pub_status=Event.PubStatus.PUB)
+        events = list(Event.objects.filter(pub_status=Event.PubStatus.PUB).order_by("start", "end", "id"))
+
+        response = self.client.get(self.url)
+        self.assertEqual(list(response.context["event_list"]), events[:10])
+        self.assertContains(response, "12 résultats")
+        next_cursor = response.context["page_obj"].next_cursor
+        self.assertContains(response, f"cursor={next_cursor}")
+
+        # the page of events and the site configuration, no COUNT
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {"cursor": next_cursor})
+        self.assertEqual(list(response.context["event_list"]), events[10:])
+        self.assertNotContains(response, "résultats")
+        self.assertIsNone(response.context["page_obj"].next_cursor)
+
+        response = self.client.get(self.url, {"cursor": response.context["page_obj"].previous_cursor})
+        self.assertEqual(list(response.context["event_list"]), events[:10])
+
+        response = self.client.get(self.url, {"cursor": "invalide"})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_list_page_count_is_cached(self):
+        self.client.get(self.url, {"theme": Event.Theme.SANTE})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"theme": Event.Theme.SANTE})
+        self.assertFalse([query for query in queries if "COUNT(" in query["sql"]])
+        count = Event.objects.filter(pub_status=Event.PubStatus.PUB, theme=Event.Theme.SANTE).count()
+        self.assertEqual(response.context["result_count"], count)
+
+        EventFactory(pub_status=Event.PubStatus.PUB, theme=Event.Theme.SANTE)
+        response = self.client.get(self.url, {"theme": Event.Theme.SANTE})
+        self.assertEqual(response.context["result_count"], count + 1)
+
+    def test_anonymous_pages_are_cached_until_events_change(self):
+        self.assertEqual(self.client.get(self.url, {"theme": ""})["X-Page-Cache"], "miss")
+        # empty and unknown parameters do not change the page
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"utm_source": "newsletter"})
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        self.assertContains(response, self.upcoming_events[0].subject)
+
+        event = EventFactory(upcoming=True, pub_status=Event.PubStatus.PUB)
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, event.subject)
+
+        self.client.force_login(EmailBasedUserFactory())
+        self.assertNotIn("X-Page-Cache", self.client.get(self.url))
+
+    def test_anonymous_pages_are_cacheable_at_the_edge(self):
+        for _ in range(2):
+            # also when served from the page cache
+            response = self.client.get(self.url)
+            self.assertEqual(response["Surrogate-Key"], "event-list")
+            self.assertEqual(response["Cache-Control"], f"public, max-age=0, s-maxage={settings.EDGE_CACHE_MAX_AGE}")
+            self.assertNotIn("Cookie", response.get("Vary", ""))
+            self.assertFalse(response.cookies)
+        self.assertEqual(response["X-Page-Cache"], "hit")
+
+        self.client.force_login(EmailBasedUserFactory())
+        response = self.client.get(self.url)
+        self.assertNotIn("Surrogate-Key", response)
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_upcoming_pages_are_cached_by_time_slot(self):
+        bucket = settings.PAGE_CACHE_UPCOMING_BUCKET
+        with mock.patch("utils.page_cache.time.time", return_value=bucket * 1000):
+            self.assertEqual(self.client.get(self.url, {"upcoming": "on"})["X-Page-Cache"], "miss")
+        with mock.patch("utils.page_cache.time.time", return_value=bucket * 1000 + bucket - 1):
+            self.assertEqual(self.client.get(self.url, {"upcoming": "on"})["X-Page-Cache"], "hit")
+        with mock.patch("utils.page_cache.time.time", return_value=bucket * 1001):
+            self.assertEqual(self.client.get(self.url, {"upcoming": "on"})["X-Page-Cache"], "miss")
+
+    def test_list_page_search_tolerates_typos(self):
+        marseille = EventFactory(upcoming=True, pub_status=Event.PubStatus.PUB, city="Marseille", subject="Forum")
+        in_subject = EventFactory(
+            upcoming=True, pub_status=Event.PubStatus.PUB, city="Lyon", subject="Retour d'expérience de Marseille"
+        )
+        EventFactory(upcoming=True, pub_status=Event.PubStatus.PRIV, city="Marseille")
+
+        response = self.client.get(self.url, {"q": "Marseile"})
+        self.assertCountEqual(response.context["event_list"], [marseille, in_subject])
+
+        response = self.client.get(self.url, {"q": marseille.zip_code})
+        self.assertIn(marseille, response.context["event_list"])
+
+
+class EventDetailViewTest(TestCase):
+    def setUp(self):
+        self.event = EventFactory(pub_status=Event.PubStatus.PUB)
+        self.contribution = ContributionFactory(event=self.event, public=True)
+        self.url = reverse("event_detail", kwargs={"pk": self.event.pk})
+
+    def test_conditional_get_until_the_event_or_its_contributions_change(self):
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.head(self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+        ContributionStatusFactory(contribution=self.contribution)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        self.contribution.public = False
+        self.contribution.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_authenticated_pages_are_not_validated(self):
+        self.client.force_login(EmailBasedUserFactory())
+        response = self.client.get(self.url)
+        self.assertNotIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+
 
 class EventRegistrationViewTest(TestCase):
     def setUp(self):
@@ -92,6 +220,7 @@ class EventRegistrationViewTest(TestCase):
 
         self.assertEqual(Booking.objects.count(), 1)
         booking = Booking.objects.get(event=self.event, participant=self.user)
+        self.assertEqual(OutgoingEmail.objects.get().dedup_key, f"booking-{booking.pk}-received")
         unregister_link = reverse("event_registration_delete", kwargs={"pk": booking.pk})
         self.assertContains(response, "Se désinscrire")
         self.assertContains(response, unregister_link)
@@ -144,6 +273,29 @@ class ContributionListViewTest(TestCase):
         for contribution in self.sante_private_contributions + self.sante_private_event_contributions:
             self.assertNotContains(response, contribution.title, html=True)
 
+    def test_cards_are_cached_until_the_contribution_changes(self):
+        contribution = self.biodiv_contributions[0]
+        self.client.get(self.url)
+        # an update bypassing save() does not bump updated_at: the cached card is shown
+        Contribution.objects.filter(pk=contribution.pk).update(title="Titre modifié")
+        self.assertNotContains(self.client.get(self.url), "Titre modifié")
+
+        contribution.refresh_from_db()
+        contribution.save()
+        self.assertContains(self.client.get(self.url), "Titre modifié")
+
+        contribution.tags.add("nouvelle-etiquette")
+        self.assertContains(self.client.get(self.url), "nouvelle-etiquette")
+
+        ContributionStatusFactory(contribution=contribution, status=ContributionStatus.Status.SELECT)
+        self.assertContains(
+            self.client.get(self.url), '<p class="fr-badge fr-badge--info fr-badge--no-icon">Retenue</p>', html=True
+        )
+
+        contribution.event.sub_theme = "Sous-thème modifié"
+        contribution.event.save()
+        self.assertContains(self.client.get(self.url), "Sous-thème modifié")
+
     def test_list_page_theme_filter(self):
         # list filter by theme
         response = self.client.get(self.url, {"theme": Event.Theme.SANTE})
@@ -182,8 +334,124 @@ class ContributionListViewTest(TestCase):
         ):
             self.assertNotContains(response, contribution.title, html=True)
 
+    def test_list_page_tag_choices_are_used_tags(self):
+        Tag.objects.create(name="inutilisée", slug="inutilisee")
+        response = self.client.get(self.url, {"theme": Event.Theme.SANTE})
+        self.assertEqual(
+            response.context["form"].fields["tag"].choices,
+            [("", "Tous"), ("tag3", "tag3 (2)"), ("tag4", "tag4 (2)")],
+        )
+
+        # the tag facets are cached: no tag query once warm
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"tag": "tag1"})
+        self.assertEqual(len(response.context["contribution_list"]), 2)
+        self.assertFalse([query for query in queries if query["sql"].startswith('SELECT "taggit_tag"."slug"')])
+        self.assertFalse([query for query in queries if "event_contributiontagfacet" in query["sql"]])
+
+        response = self.client.get(self.url, {"tag": "inutilisee"})
+        self.assertEqual(len(response.context["contribution_list"]), 4)
+
+    def test_list_page_status_filter(self):
+        selected = self.biodiv_contributions[0]
+        ContributionStatusFactory(contribution=selected, status=ContributionStatus.Status.STUDY)
+        ContributionStatusFactory(contribution=selected, status=ContributionStatus.Status.SELECT)
+        ContributionStatusFactory(contribution=self.sante_contributions[0], status=ContributionStatus.Status.STUDY)
+
+        response = self.client.get(self.url, {"status": ContributionStatus.Status.SELECT})
+        self.assertContains(response, selected.title, html=True)
+        for contribution in self.biodiv_contributions[1:] + self.sante_contributions:
+            self.assertNotContains(response, contribution.title, html=True)
+
+    def test_list_page_current_status_without_query_per_contribution(self):
+        for contribution in self.biodiv_contributions + self.sante_contributions:
+            ContributionStatusFactory(contribution=contribution)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertContains(response, "fr-badge--info", count=4)
+        self.assertFalse([query for query in queries if 'FROM "event_contributionstatus"' in query["sql"]])
+
+    def test_list_page_search(self):
+        best = ContributionFactory(
+            title="Rénovation de l'école du village",
+            description="Isoler les bâtiments scolaires",
+            public=True,
+            event__pub_status=Event.PubStatus.PUB,
+        )
+        other = ContributionFactory(
+            title="Cantine",
+            description="Des repas locaux à l'école",
+            public=True,
+            event__pub_status=Event.PubStatus.PUB,
+        )
+        tagged = ContributionFactory(
+            title="Transports", public=True, event__pub_status=Event.PubStatus.PUB, tags=["ecoles"]
+        )
+        ContributionFactory(
+            title="Privée sur l'école", description="école", public=False, event__pub_status=Event.PubStatus.PUB
+        )
+
+        # accents are ignored, title matches rank first, tags are searched too
+        expected = [best, other, tagged]
+        response = self.client.get(self.url, {"q": "ecole"})
+        # the generated descriptions of the other contributions may contain the word too
+        self.assertEqual([c for c in response.context["contribution_list"] if c in expected], expected)
+
+        response = self.client.get(self.url, {"q": "école"})
+        self.assertEqual([c for c in response.context["contribution_list"] if c in expected], expected)
+        self.assertContains(response, "Des repas locaux à l&#x27;<mark>école</mark>", html=False)
+
+        response = self.client.get(self.url, {"q": "cantine", "theme": other.event.theme})
+        self.assertContains(response, other.title, html=True)
+        self.assertNotContains(response, best.title, html=True)
+
+    def test_list_page_search_is_updated_and_escaped(self):
+        contribution = ContributionFactory(title="Sans rapport", public=True, event__pub_status=Event.PubStatus.PUB)
+        contribution.description = "Un garage a velo & des pistes <script>alert(1)</script>"
+        contribution.save()
+
+        response = self.client.get(self.url, {"q": "velo"})
+        self.assertEqual(list(response.context["contribution_list"]), [contribution])
+        self.assertNotContains(response, "<script>alert", html=False)
+        self.assertContains(response, "<mark>velo</mark> &amp; des pistes", html=False)
+
 
 class ContributionDetailViewTest(TestCase):
+    def test_changes_purge_the_edge_cache(self):
+        contribution = ContributionFactory(public=True)
+        response = self.client.get(reverse("contribution_detail", kwargs={"pk": contribution.pk}))
+        keys = [f"contribution-{contribution.pk}", f"event-{contribution.event_id}"]
+        self.assertEqual(response["Surrogate-Key"].split(), keys)
+
+        with StubServer() as server, override_settings(EDGE_PURGE_URL=server.url + "/purge"):
+            with self.captureOnCommitCallbacks(execute=True):
+                ContributionStatusFactory(contribution=contribution)
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(server.requests[0]["method"], "PURGE")
+        self.assertEqual(server.requests[0]["path"], "/purge")
+        purged = server.requests[0]["headers"]["Surrogate-Key"].split()
+        self.assertEqual(set(purged), {"contribution-list", *keys})
+
+    def test_failed_purge_is_logged(self):
+        with StubServer(default=(503, {}, {})) as server, override_settings(EDGE_PURGE_URL=server.url):
+            with self.assertLogs("utils.edge_cache", "WARNING"), self.captureOnCommitCallbacks(execute=True):
+                ContributionFactory(public=True)
+
+    def test_conditional_get_until_the_contribution_or_its_event_change(self):
+        contribution = ContributionFactory(public=True)
+        url = reverse("contribution_detail", kwargs={"pk": contribution.pk})
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        contribution.event.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        # a private contribution is not validated, the visitor is sent to the login page
+        contribution.public = False
+        contribution.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, 302)
+
     def test_anonymous_user_cannot_see_not_public_contribution(self):
         contribution = ContributionFactory(public=False)
         url = reverse("contribution_detail", kwargs={"pk": contribution.pk})
@@ -6,10 +6,14 @@ from event.views.organizer import (
     OrganizerDashboardView,
     OrganizerEventCreateView,
     OrganizerEventDetailView,
+    OrganizerEventExportCreateView,
+    OrganizerEventExportDownloadView,
+    OrganizerEventExportStatusView,
     OrganizerEventOrganizerAddView,
     OrganizerEventParticipantsExportView,
     OrganizerEventUpdateView,
     OrganizerRegistrationAcceptView,
+    OrganizerRegistrationBulkView,
     OrganizerRegistrationDeclineView,
 )
 from event.views.participant import (
@@ -33,6 +37,21 @@ urlpatterns = [
         OrganizerEventParticipantsExportView.as_view(),
         name="event_organizer_event_participants_export",
     ),
+    path(
+        "organizer/event/<int:pk>/export/",
+        OrganizerEventExportCreateView.as_view(),
+        name="event_organizer_event_export",
+    ),
+    path(
+        "organizer/export/<int:pk>/",
+        OrganizerEventExportStatusView.as_view(),
+        name="event_organizer_export_status",
+    ),
+    path(
+        "organizer/export/<int:pk>/download",
+        OrganizerEventExportDownloadView.as_view(),
+        name="event_organizer_export_download",
+    ),
     path(
         "organizer/registration/<int:pk>/accept/",
         OrganizerRegistrationAcceptView.as_view(),
@@ -43,6 +62,11 @@ urlpatterns = [
         OrganizerRegistrationDeclineView.as_view(),
         name="event_organizer_registration_decline",
     ),
+    path(
+        "organizer/event/<int:pk>/registrations/bulk/",
+        OrganizerRegistrationBulkView.as_view(),
+        name="event_organizer_registration_bulk",
+    ),
     path(
         "organizer/event/<int:event_pk>/contribution/create",
         ContributionCreateView.as_view(),
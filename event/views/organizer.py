@@ -1,29 +1,52 @@
 import csv
+import hashlib
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.http import HttpResponse
+from django.db import transaction
+from django.http import Http404, HttpResponseBadRequest, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 from django.views.generic import DetailView, FormView, UpdateView, View
 from django.views.generic.list import ListView
 
+from event.exports import PARTICIPANT_HEADER, get_participant_rows, request_export
 from event.forms import AddOrganizerForm, ContributionForm, EventForm
-from event.models import Booking, Contribution, Event
-from utils.emails import send_email
+from event.models import Booking, Contribution, Event, EventExport
+from event.permissions import get_organized_event_ids
+from utils.emails import queue_batch_email, queue_email
+from utils.metrics import MODEL_WRITES
 
 
 UserModel = get_user_model()
 
 
 class OrganizerMixin(LoginRequiredMixin, UserPassesTestMixin):
+    event_url_kwarg = "pk"
+
     def test_func(self):
         return self.request.user.is_organizer
 
+    @cached_property
+    def organized_event_ids(self):
+        return get_organized_event_ids(self.request.user)
+
+    def check_event_organizer(self, event_id):
+        """Only the event organizers can view or edit it and its bookings, contributions and exports"""
+        if event_id not in self.organized_event_ids:
+            raise Http404("Vous n'organisez pas cette concertation.")
+
+    def get_event(self):
+        if not hasattr(self, "event"):
+            self.check_event_organizer(self.kwargs[self.event_url_kwarg])
+            self.event = get_object_or_404(Event, pk=self.kwargs[self.event_url_kwarg])
+        return self.event
+
 
 class OrganizerDashboardView(OrganizerMixin, ListView):
     model = Event
@@ -31,7 +54,7 @@ class OrganizerDashboardView(OrganizerMixin, ListView):
     template_name = "event/organizer/dashboard.html"
 
     def get_queryset(self):
-        qs = Event.objects.filter(organizers__in=[self.request.user]).order_by("start")
+        qs = Event.objects.filter(pk__in=self.organized_event_ids).order_by("start")
         return qs
 
     def get_context_data(self, **kwargs):
@@ -59,13 +82,16 @@ class OrganizerEventDetailView(OrganizerMixin, DetailView):
     model = Event
 
     def get_object(self, *args, **kwargs):
-        event = get_object_or_404(Event, pk=self.kwargs["pk"], organizers__in=[self.request.user])
-        return event
+        self.check_event_organizer(self.kwargs["pk"])
+        return get_object_or_404(Event, pk=self.kwargs["pk"])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["bookings"] = Booking.objects.filter(event=self.object)
-        context["contributions"] = Contribution.objects.filter(event=self.object)
+        context["bookings"] = Booking.objects.filter(event=self.object).select_related("participant")
+        context["contributions"] = (
+            Contribution.objects.filter(event=self.object).select_related("current_status").prefetch_related("tags")
+        )
+        context["organizers"] = self.object.organizers.all()
         return context
 
 
@@ -74,58 +100,72 @@ class OrganizerEventUpdateView(OrganizerMixin, UpdateView):
     form_class = EventForm
 
     def get_object(self, *args, **kwargs):
-        return get_object_or_404(Event, pk=self.kwargs["pk"], organizers__in=[self.request.user])
+        self.check_event_organizer(self.kwargs["pk"])
+        return get_object_or_404(Event, pk=self.kwargs["pk"])
 
     def get_success_url(self):
         return reverse("event_organizer_event_detail", kwargs={"pk": self.object.pk})
 
 
+class Echo:
+    """File-like object handing each written CSV line back to the caller instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
 class OrganizerEventParticipantsExportView(OrganizerMixin, View):
-    def get_event(self, *args, **kwargs):
-        return get_object_or_404(Event, pk=self.kwargs["pk"], organizers__in=[self.request.user])
+    def get_rows(self, event):
+        writer = csv.writer(Echo(), quoting=csv.QUOTE_NONNUMERIC, escapechar="\\", quotechar='"')
+        yield writer.writerow(PARTICIPANT_HEADER)
+        for row in get_participant_rows(event):
+            yield writer.writerow(row)
 
     def get(self, request, *args, **kwargs):
         event = self.get_event()
         event_slug = slugify(event.subject)
 
-        response = HttpResponse(
+        return StreamingHttpResponse(
+            self.get_rows(event),
             content_type="text/csv",
             headers={"Content-Disposition": f'attachment; filename="participants-{event_slug}.csv"'},
         )
-        writer = csv.writer(response, quoting=csv.QUOTE_NONNUMERIC, escapechar="\\", quotechar='"')
-        writer.writerow(["Prénom", "Nom", "Email", "Aide", "Commentaire", "État"])
-
-        bookings = Booking.objects.filter(event=event)
-        for booking in bookings:
-            if booking.confirmed_on:
-                status = f"Confirmée le {booking.confirmed_on}"
-            elif booking.cancelled_on:
-                status = f"Déclinée le {booking.cancelled_on}"
-            else:
-                status = "En attente"
-
-            writer.writerow(
-                [
-                    booking.participant.first_name,
-                    booking.participant.last_name,
-                    booking.participant.email,
-                    "oui" if booking.offer_help else "non",
-                    booking.comment.replace('"', "''"),
-                    status,
-                ]
-            )
 
-        return response
+
+class OrganizerEventExportCreateView(OrganizerMixin, View):
+    """Start (or reuse) the background export of all the event data"""
+
+    def post(self, request, **kwargs):
+        export = request_export(self.get_event(), request.user)
+        return render(request, "event/organizer/partials/export_status.html", context={"export": export})
+
+
+class OrganizerEventExportStatusView(OrganizerMixin, View):
+    """Polled by htmx until the export is finished"""
+
+    def get_export(self):
+        export = get_object_or_404(EventExport, pk=self.kwargs["pk"])
+        self.check_event_organizer(export.event_id)
+        return export
+
+    def get(self, request, **kwargs):
+        return render(request, "event/organizer/partials/export_status.html", context={"export": self.get_export()})
+
+
+class OrganizerEventExportDownloadView(OrganizerEventExportStatusView):
+    def get(self, request, **kwargs):
+        export = self.get_export()
+        if export.status != EventExport.Status.DONE:
+            raise Http404("Cet export n'est pas encore disponible.")
+        return HttpResponseRedirect(export.file.url)
 
 
 class OrganizerRegistrationBaseView(OrganizerMixin, View):
     def get_booking(self):
         if not hasattr(self, "booking"):
-            self.booking = get_object_or_404(
-                Booking,
-                pk=self.kwargs["pk"],
-                event__organizers__in=[self.request.user],  # only event organizer can view/edit booking
-            )
+            booking = get_object_or_404(Booking.objects.select_related("participant", "event"), pk=self.kwargs["pk"])
+            self.check_event_organizer(booking.event_id)
+            self.booking = booking
         return self.booking
 
 
@@ -133,17 +173,20 @@ class OrganizerRegistrationAcceptView(OrganizerRegistrationBaseView):
     def post(self, request, **kwargs):
         booking = self.get_booking()
         booking.confirmed_on = timezone.now()
-        send_email(
-            to=[
-                {
-                    "name": f"{booking.participant.first_name} {booking.participant.last_name}",
-                    "email": booking.participant.email,
-                }
-            ],
-            params={"event_subject": booking.event.subject},
-            template_id=settings.BREVO_PARTICIPATION_ACCEPTED_TEMPLATE,
-        )
-        booking.save()
+        with transaction.atomic():
+            booking.save()
+            queue_email(
+                to=[
+                    {
+                        "name": f"{booking.participant.first_name} {booking.participant.last_name}",
+                        "email": booking.participant.email,
+                    }
+                ],
+                params={"event_subject": booking.event.subject},
+                template_id=settings.BREVO_PARTICIPATION_ACCEPTED_TEMPLATE,
+                # per transition: accepting again after a decline must notify again
+                dedup_key=f"booking-{booking.pk}-accepted-{booking.confirmed_on.isoformat()}",
+            )
         return render(request, "event/organizer/partials/booking_row.html", context={"booking": booking})
 
 
@@ -152,32 +195,94 @@ class OrganizerRegistrationDeclineView(OrganizerRegistrationBaseView):
         booking = self.get_booking()
         booking.cancelled_on = timezone.now()
         booking.cancelled_by = request.user
-        send_email(
-            to=[
-                {
-                    "name": f"{booking.participant.first_name} {booking.participant.last_name}",
-                    "email": booking.participant.email,
-                }
-            ],
-            params={"event_subject": booking.event.subject},
-            template_id=settings.BREVO_PARTICIPATION_DECLINE_TEMPLATE,
-        )
-        booking.save()
+        with transaction.atomic():
+            booking.save()
+            queue_email(
+                to=[
+                    {
+                        "name": f"{booking.participant.first_name} {booking.participant.last_name}",
+                        "email": booking.participant.email,
+                    }
+                ],
+                params={"event_subject": booking.event.subject},
+                template_id=settings.BREVO_PARTICIPATION_DECLINE_TEMPLATE,
+                dedup_key=f"booking-{booking.pk}-declined-{booking.cancelled_on.isoformat()}",
+            )
         return render(request, "event/organizer/partials/booking_row.html", context={"booking": booking})
 
 
+class OrganizerRegistrationBulkView(OrganizerMixin, View):
+    """
+    Accept or decline several pending bookings of an event at once: the selected ones
+    (`booking` ids) or all of them (`all_pending`). Bookings are updated with a single UPDATE and
+    participants are notified by one batched Brevo email.
+    """
+
+    ACTIONS = {
+        "accept": settings.BREVO_PARTICIPATION_ACCEPTED_TEMPLATE,
+        "decline": settings.BREVO_PARTICIPATION_DECLINE_TEMPLATE,
+    }
+
+    def get_pending_bookings(self, event):
+        bookings = Booking.objects.filter(event=event, confirmed_on__isnull=True, cancelled_on__isnull=True)
+        if not self.request.POST.get("all_pending"):
+            booking_ids = [pk for pk in self.request.POST.getlist("booking") if pk.isdigit()]
+            bookings = bookings.filter(pk__in=booking_ids)
+        return bookings
+
+    def post(self, request, **kwargs):
+        action = request.POST.get("action")
+        if action not in self.ACTIONS:
+            return HttpResponseBadRequest()
+
+        event = self.get_event()
+        with transaction.atomic():
+            participants = list(
+                self.get_pending_bookings(event)
+                .select_for_update(of=("self",))
+                .order_by("pk")
+                .values_list("pk", "participant__first_name", "participant__last_name", "participant__email")
+            )
+            booking_ids = [booking_id for booking_id, *_ in participants]
+            if action == "accept":
+                Booking.objects.filter(pk__in=booking_ids).update(confirmed_on=timezone.now())
+            else:
+                Booking.objects.filter(pk__in=booking_ids).update(
+                    cancelled_on=timezone.now(), cancelled_by=request.user
+                )
+            # a bulk UPDATE sends no post_save signal
+            MODEL_WRITES.labels("booking", "updated").inc(len(booking_ids))
+
+            if participants:
+                batch_hash = hashlib.sha1(",".join(map(str, booking_ids)).encode()).hexdigest()
+                queue_batch_email(
+                    versions=[
+                        {
+                            "to": [{"name": f"{first_name} {last_name}", "email": email}],
+                            "params": {"event_subject": event.subject},
+                        }
+                        for _, first_name, last_name, email in participants
+                    ],
+                    template_id=self.ACTIONS[action],
+                    dedup_key=f"event-{event.pk}-{action}-{batch_hash}",
+                )
+
+        bookings = Booking.objects.filter(event=event).select_related("participant")
+        return render(
+            request, "event/organizer/partials/booking_rows.html", context={"event": event, "bookings": bookings}
+        )
+
+
 class ContributionCreateView(OrganizerMixin, FormView):
     template_name = "event/organizer/contribution_edit.html"
     form_class = ContributionForm
+    event_url_kwarg = "event_pk"
 
     def get_initial(self):
         initial = super().get_initial()
         initial["public"] = True
         return initial
 
-    def get_event(self):
-        return get_object_or_404(Event, pk=self.kwargs.get("event_pk"), organizers__in=[self.request.user])
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["event"] = self.get_event()
@@ -205,7 +310,11 @@ class ContributionUpdateView(OrganizerMixin, UpdateView):
         return context
 
     def get_object(self, *args, **kwargs):
-        return get_object_or_404(Contribution, pk=self.kwargs["pk"], event__organizers__in=[self.request.user])
+        contribution = get_object_or_404(
+            Contribution.objects.select_related("event", "current_status"), pk=self.kwargs["pk"]
+        )
+        self.check_event_organizer(contribution.event_id)
+        return contribution
 
     def get_initial(self):
         initial = super().get_initial()
@@ -222,7 +331,9 @@ class OrganizerEventOrganizerAddView(OrganizerMixin, FormView):
     form_class = AddOrganizerForm
 
     def get_event(self):
-        return get_object_or_404(Event, pk=self.kwargs.get("event_pk"), owner=self.request.user)
+        if not hasattr(self, "event"):
+            self.event = get_object_or_404(Event, pk=self.kwargs["event_pk"], owner=self.request.user)
+        return self.event
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1,20 +1,32 @@
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.db import transaction
+from django.db.models import Count, Max, Q
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views.generic import DetailView, FormView
 from django.views.generic.edit import DeleteView
 from django.views.generic.list import ListView
-from taggit.models import Tag
 
+from event.facets import get_tag_facets
 from event.forms import ContributionListFilterForm, EventListFilterForm, EventRegistrationForm
-from event.models import Booking, Contribution, Event
-from utils.emails import send_email
+from event.models import Booking, Contribution, ContributionStatus, Event
+from event.search import add_headlines, search_contributions, search_events
+from utils.conditional import anonymous_condition
+from utils.counting import count_results
+from utils.edge_cache import SurrogateKeyMixin
+from utils.emails import queue_email
+from utils.page_cache import AnonymousPageCacheMixin
+from utils.pagination import KeysetPaginationMixin
 
 
-class EventListView(ListView):
+class EventListView(AnonymousPageCacheMixin, SurrogateKeyMixin, KeysetPaginationMixin, ListView):
     model = Event
     paginate_by = 10
+    page_cache_params = ("theme", "scale", "upcoming", "q", "cursor", "page")
+    page_cache_generations = ("events",)
+    page_cache_buckets = {"upcoming": settings.PAGE_CACHE_UPCOMING_BUCKET}
 
     def get_theme(self):
         filter_theme = self.request.GET.get("theme", None)
@@ -27,6 +39,20 @@ class EventListView(ListView):
     def get_upcoming(self):
         return self.request.GET.get("upcoming", None) == "on"
 
+    def get_search(self):
+        return self.request.GET.get("q", "").strip()[:200]
+
+    def get_surrogate_keys(self):
+        return ["event-list"]
+
+    def get_keyset_ordering(self):
+        # search results are ordered by similarity, they keep the page numbers
+        return None if self.get_search() else ("start", "end", "id")
+
+    def get_result_count(self, queryset):
+        key = ("event_list", self.get_theme(), self.get_scale(), self.get_upcoming())
+        return count_results(queryset, key, generations=["events"])
+
     def get_queryset(self):
         if self.get_upcoming():
             qs = Event.current_and_upcomings.filter(pub_status=Event.PubStatus.PUB)
@@ -40,26 +66,62 @@ class EventListView(ListView):
         filter_scale = self.get_scale()
         if filter_scale:
             qs = qs.filter(scale=filter_scale)
+
+        search = self.get_search()
+        if search:
+            qs = search_events(qs, search)
         return qs
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data()
         context["form"] = EventListFilterForm(
-            initial={"theme": self.get_theme(), "scale": self.get_scale(), "upcoming": self.get_upcoming()}
+            initial={
+                "theme": self.get_theme(),
+                "scale": self.get_scale(),
+                "upcoming": self.get_upcoming(),
+                "q": self.get_search(),
+            }
         )
         context["current_page_event_list"] = True
         return context
 
 
-class EventDetailView(DetailView):
+def get_event_validators(request, pk):
+    """ETag and Last-Modified of the event page: the event and its public contributions, in a single query"""
+    row = (
+        Event.objects.filter(pk=pk)
+        .annotate(
+            contributions_updated_at=Max("contribute__updated_at", filter=Q(contribute__public=True)),
+            contribution_count=Count("contribute", filter=Q(contribute__public=True)),
+        )
+        .values_list("updated_at", "contributions_updated_at", "contribution_count")
+        .first()
+    )
+    if row is None:
+        return None
+    updated_at, contributions_updated_at, contribution_count = row
+    # the count changes when a contribution is deleted or made private
+    last_modified = max(updated_at, contributions_updated_at or updated_at)
+    return f"event-{pk}-{contribution_count}-{last_modified.timestamp()}", last_modified
+
+
+@method_decorator(anonymous_condition(get_event_validators), name="dispatch")
+class EventDetailView(AnonymousPageCacheMixin, SurrogateKeyMixin, DetailView):
     model = Event
+    page_cache_generations = ("events", "contributions")
+
+    def get_surrogate_keys(self):
+        return [f"event-{self.object.pk}"]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if self.request.user.is_authenticated:
             context["booking"] = Booking.objects.filter(event=self.object, participant=self.request.user).first()
 
-        context["contributions"] = Contribution.objects.filter(event=self.object, public=True).prefetch_related("tags")
+        # the tags are prefetched by render_cached, for the cards missing from the cache
+        context["contributions"] = Contribution.objects.filter(event=self.object, public=True).select_related(
+            "event", "current_status"
+        )
         context["current_page_event_list"] = True
         return context
 
@@ -74,17 +136,19 @@ class EventRegistrationView(LoginRequiredMixin, FormView):
     def form_valid(self, form):
         form.instance.event = self.get_event()
         form.instance.participant = self.request.user
-        send_email(
-            to=[
-                {
-                    "name": f"{form.instance.participant.first_name} {form.instance.participant.last_name}",
-                    "email": form.instance.participant.email,
-                }
-            ],
-            params={"event_subject": form.instance.event.subject},
-            template_id=settings.BREVO_PARTICIPATION_RECEIVED_TEMPLATE,
-        )
-        form.save()
+        with transaction.atomic():
+            booking = form.save()
+            queue_email(
+                to=[
+                    {
+                        "name": f"{booking.participant.first_name} {booking.participant.last_name}",
+                        "email": booking.participant.email,
+                    }
+                ],
+                params={"event_subject": booking.event.subject},
+                template_id=settings.BREVO_PARTICIPATION_RECEIVED_TEMPLATE,
+                dedup_key=f"booking-{booking.pk}-received",
+            )
         return super().form_valid(form)
 
     def get_context_data(self, **kwargs):
@@ -108,9 +172,11 @@ class EventRegistrationDeleteView(LoginRequiredMixin, UserPassesTestMixin, Delet
         return reverse("event_detail", kwargs={"pk": self.object.event.pk})
 
 
-class ContributionListView(ListView):
+class ContributionListView(AnonymousPageCacheMixin, SurrogateKeyMixin, KeysetPaginationMixin, ListView):
     model = Contribution
     paginate_by = 10
+    page_cache_params = ("theme", "tag", "scale", "status", "q", "cursor", "page")
+    page_cache_generations = ("events", "contributions", "tag_facets")
 
     def get_theme(self):
         filter_theme = self.request.GET.get("theme", None)
@@ -118,14 +184,35 @@ class ContributionListView(ListView):
 
     def get_tag(self):
         filter_tag = self.request.GET.get("tag", None)
-        return filter_tag if (filter_tag,) in Tag.objects.values_list("slug") else None
+        return filter_tag if filter_tag in get_tag_facets() else None
 
     def get_scale(self):
         filter_scale = self.request.GET.get("scale", None)
         return filter_scale if filter_scale in Event.Scale.values else None
 
+    def get_status(self):
+        filter_status = self.request.GET.get("status", None)
+        return filter_status if filter_status in ContributionStatus.Status.values else None
+
+    def get_search(self):
+        return self.request.GET.get("q", "").strip()[:200]
+
+    def get_surrogate_keys(self):
+        return ["contribution-list"]
+
+    def get_keyset_ordering(self):
+        # search results are ordered by rank, they keep the page numbers
+        return None if self.get_search() else ("title", "id")
+
+    def get_result_count(self, queryset):
+        key = ("contribution_list", self.get_theme(), self.get_tag(), self.get_scale(), self.get_status())
+        return count_results(queryset, key, generations=["events", "contributions"])
+
     def get_queryset(self):
-        qs = Contribution.objects.filter(event__pub_status=Event.PubStatus.PUB, public=True)
+        # the tags are prefetched by render_cached, for the cards missing from the cache
+        qs = Contribution.objects.filter(event__pub_status=Event.PubStatus.PUB, public=True).select_related(
+            "event", "current_status"
+        )
 
         filter_theme = self.get_theme()
         if filter_theme:
@@ -138,19 +225,50 @@ class ContributionListView(ListView):
         filter_scale = self.get_scale()
         if filter_scale:
             qs = qs.filter(event__scale=filter_scale)
+
+        filter_status = self.get_status()
+        if filter_status:
+            qs = qs.filter(current_status__status=filter_status)
+
+        search = self.get_search()
+        if search:
+            return search_contributions(qs, search)
         return qs.order_by("title")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data()
         context["form"] = ContributionListFilterForm(
-            initial={"theme": self.get_theme(), "tag": self.get_tag(), "scale": self.get_scale()}
+            initial={
+                "theme": self.get_theme(),
+                "tag": self.get_tag(),
+                "scale": self.get_scale(),
+                "status": self.get_status(),
+                "q": self.get_search(),
+            }
         )
+        if self.get_search():
+            add_headlines(context["object_list"], self.get_search())
         context["current_page_contribution_list"] = True
         return context
 
 
-class ContributionDetailView(UserPassesTestMixin, DetailView):
+def get_contribution_validators(request, pk):
+    """ETag and Last-Modified of a public contribution page: the contribution (with its status) and its event"""
+    row = Contribution.objects.filter(pk=pk, public=True).values_list("updated_at", "event__updated_at").first()
+    if row is None:
+        return None
+    last_modified = max(row)
+    return f"contribution-{pk}-{last_modified.timestamp()}", last_modified
+
+
+@method_decorator(anonymous_condition(get_contribution_validators), name="dispatch")
+class ContributionDetailView(AnonymousPageCacheMixin, SurrogateKeyMixin, UserPassesTestMixin, DetailView):
     model = Contribution
+    page_cache_generations = ("events", "contributions")
+    queryset = Contribution.objects.select_related("event", "current_status")
+
+    def get_surrogate_keys(self):
+        return [f"contribution-{self.object.pk}", f"event-{self.object.event_id}"]
 
     def test_func(self):
         if self.request.user.is_authenticated and self.request.user == self.get_object().event.owner:
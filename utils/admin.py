@@ -0,0 +1,25 @@
+from django.contrib import admin
+
+from utils.models import OutgoingEmail, QueryFingerprint
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ["pk", "template_id", "dedup_key", "status", "attempts", "next_attempt_on", "sent_on"]
+    list_filter = ["status"]
+    search_fields = ("dedup_key",)
+
+
+@admin.register(QueryFingerprint)
+class QueryFingerprintAdmin(admin.ModelAdmin):
+    list_display = ["view", "short_sql", "calls", "total_time", "average_time", "max_time", "last_seen"]
+    list_filter = ["view"]
+    search_fields = ("sql", "view")
+    readonly_fields = [field.name for field in QueryFingerprint._meta.fields]
+
+    @admin.display(description="Requête")
+    def short_sql(self, obj):
+        return obj.sql[:120]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,84 @@
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+# metrics compared with the baseline, all "lower is better"
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "queries", "peak_memory_kib")
+
+
+def percentiles(values):
+    """p50, p95 and p99 of at least two values, interpolated between the closest ones"""
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def _request(client, method, path, data):
+    response = getattr(client, method)(path, data)
+    if response.streaming:
+        # a streamed response does its work while it is consumed
+        b"".join(response.streaming_content)
+    return response
+
+
+def measure_view(client, method, path, data=None, iterations=50, warmup=5):
+    """
+    Request `path` `warmup` + `iterations` times and return its latency percentiles (in milliseconds),
+    the number and duration of its queries and the peak memory allocated while handling it.
+    """
+    data = data or {}
+    for _ in range(warmup):
+        _request(client, method, path, data)
+
+    durations, query_counts, query_durations = [], [], []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = _request(client, method, path, data)
+            durations.append((time.perf_counter() - start) * 1000)
+        query_counts.append(len(queries))
+        query_durations.append(sum(float(query["time"]) for query in queries) * 1000)
+
+    # tracing allocations slows everything down: measured apart from the latency
+    tracemalloc.start()
+    try:
+        _request(client, method, path, data)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    p50, p95, p99 = percentiles(durations)
+    return {
+        "status": response.status_code,
+        "iterations": iterations,
+        "p50_ms": round(p50, 2),
+        "p95_ms": round(p95, 2),
+        "p99_ms": round(p99, 2),
+        "max_ms": round(max(durations), 2),
+        "queries": max(query_counts),
+        "query_ms": round(statistics.median(query_durations), 2),
+        "peak_memory_kib": round(peak_memory / 1024),
+    }
+
+
+def compare_reports(baseline, report, threshold=0.2):
+    """
+    Regressions of `report` over `baseline`, as (view, metric, baseline value, value) tuples:
+    one more query is a regression, the other metrics may grow by `threshold` (a ratio).
+    Views missing from either report are ignored.
+    """
+    regressions = []
+    for name, results in report["views"].items():
+        if name not in baseline["views"]:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = baseline["views"][name].get(metric), results.get(metric)
+            if before is None or after is None:
+                continue
+            limit = before if metric == "queries" else before * (1 + threshold)
+            if after > limit:
+                regressions.append((name, metric, before, after))
+    return regressions
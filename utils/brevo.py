@@ -0,0 +1,198 @@
+import functools
+import importlib.util
+import logging
+import random
+import threading
+import time
+
+import httpx
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from utils.metrics import BREVO_REJECTED, BREVO_REQUEST_DURATION
+from utils.timing import timed
+
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class BrevoError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class BrevoUnavailable(BrevoError):
+    """Raised without calling Brevo while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Open the circuit after `failure_threshold` consecutive failed calls, then let a single
+    trial call through once `reset_timeout` seconds have passed.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.clock() - self.opened_at >= self.reset_timeout:
+                # half-open: restart the timer so that concurrent callers keep failing fast
+                self.opened_at = self.clock()
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("Brevo circuit breaker opened after %s failures", self.failures)
+                self.opened_at = self.clock()
+
+
+class BrevoStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record_call(self, latency, error):
+        BREVO_REQUEST_DURATION.labels("error" if error else "success").observe(latency)
+        with self.lock:
+            self.calls += 1
+            self.errors += int(error)
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def record_retry(self):
+        with self.lock:
+            self.retries += 1
+
+    def record_rejected(self):
+        BREVO_REJECTED.inc()
+        with self.lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "retries": self.retries,
+                "rejected": self.rejected,
+                "latency_avg": self.latency_total / self.calls if self.calls else 0.0,
+                "latency_max": self.latency_max,
+            }
+
+
+class BrevoClient:
+    """
+    Thread-safe Brevo API client keeping its connections alive between calls.
+    Retries 429/5xx responses and transport errors with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        api_key,
+        timeout=10.0,
+        connect_timeout=3.0,
+        max_retries=2,
+        backoff=0.5,
+        max_connections=10,
+        breaker=None,
+        transport=None,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = BrevoStats()
+        self.http = httpx.Client(
+            headers={"api-key": api_key, "Content-Type": "application/json", "Accept": "application/json"},
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            http2=importlib.util.find_spec("h2") is not None,
+            transport=transport,
+        )
+
+    def get_retry_delay(self, attempt, response=None):
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return min(float(response.headers["Retry-After"]), self.backoff * 2**self.max_retries)
+        return random.uniform(0, self.backoff * 2**attempt)
+
+    def post(self, url, payload):
+        if not self.breaker.allow():
+            self.stats.record_rejected()
+            raise BrevoUnavailable("Brevo est indisponible (circuit ouvert)")
+
+        for attempt in range(self.max_retries + 1):
+            response = None
+            start = time.perf_counter()
+            try:
+                with timed("brevo"):
+                    response = self.http.post(url, json=payload)
+            except httpx.TransportError as exc:
+                error = BrevoError(f"{exc.__class__.__name__}: {exc}")
+            else:
+                if response.is_success:
+                    self.stats.record_call(time.perf_counter() - start, error=False)
+                    self.breaker.record_success()
+                    return response.json() if response.content else {}
+                error = BrevoError(f"Brevo a répondu {response.status_code}: {response.text}", response.status_code)
+            self.stats.record_call(time.perf_counter() - start, error=True)
+
+            if response is not None and response.status_code not in RETRYABLE_STATUS_CODES:
+                # the payload was rejected, Brevo itself is fine
+                self.breaker.record_success()
+                raise error
+            if attempt < self.max_retries:
+                self.stats.record_retry()
+                time.sleep(self.get_retry_delay(attempt, response))
+
+        self.breaker.record_failure()
+        raise error
+
+    def close(self):
+        self.http.close()
+
+
+@functools.cache
+def get_brevo_client():
+    """Process-wide client, created on first use in each worker process"""
+    return BrevoClient(
+        api_key=settings.BREVO_API_KEY,
+        timeout=settings.BREVO_TIMEOUT,
+        connect_timeout=settings.BREVO_CONNECT_TIMEOUT,
+        max_retries=settings.BREVO_MAX_RETRIES,
+        max_connections=settings.BREVO_MAX_CONNECTIONS,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.BREVO_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.BREVO_CIRCUIT_RESET_TIMEOUT,
+        ),
+    )
+
+
+@receiver(setting_changed)
+def reset_brevo_client(setting, **kwargs):
+    if setting.startswith("BREVO_"):
+        get_brevo_client.cache_clear()
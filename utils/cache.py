@@ -0,0 +1,54 @@
+import threading
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+
+
+def get_generation(name):
+    """Current generation of a cached data set, shared by all processes through the "generations" cache"""
+    return caches["generations"].get_or_set(f"generation:{name}", time.time_ns, timeout=None)
+
+
+def _bump(name):
+    try:
+        caches["generations"].incr(f"generation:{name}")
+    except ValueError:
+        caches["generations"].set(f"generation:{name}", time.time_ns(), timeout=None)
+
+
+def bump_generation(name):
+    """
+    Invalidate the copies of a data set cached by every process.
+    Bumped again on commit, as other processes may have reloaded the data before it was committed.
+    """
+    _bump(name)
+    transaction.on_commit(lambda: _bump(name))
+
+
+class GenerationCache:
+    """
+    Keep the result of `load()` in process memory until the generation `name` is bumped.
+    `max_age` bounds the staleness when the generations cache is not shared between processes.
+    """
+
+    def __init__(self, name, load, max_age=300):
+        self.name = name
+        self.load = load
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.generation = None
+        self.loaded_at = 0.0
+        self.value = None
+
+    def get(self):
+        generation = get_generation(self.name)
+        with self.lock:
+            if generation != self.generation or time.monotonic() - self.loaded_at > self.max_age:
+                self.value = self.load()
+                self.generation = generation
+                self.loaded_at = time.monotonic()
+            return self.value
+
+    def invalidate(self):
+        bump_generation(self.name)
@@ -0,0 +1,30 @@
+from django.views.decorators.http import condition
+
+
+def anonymous_condition(get_validators):
+    """
+    condition() decorator answering the conditional GET and HEAD requests of anonymous visitors with
+    the (etag, last_modified) pair returned by get_validators(request, *args, **kwargs), computed once
+    for both validators: 304 Not Modified is returned before the view runs when the client copy is
+    current. get_validators returns None for the pages that must not be validated (not visible, missing).
+    The pages of authenticated visitors, or showing a pending message, are not validated.
+    """
+
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, "_conditional_validators"):
+            request._conditional_validators = None
+            if (
+                request.method in ("GET", "HEAD")
+                and not request.user.is_authenticated
+                and "messages" not in request.COOKIES
+            ):
+                request._conditional_validators = get_validators(request, *args, **kwargs)
+        return request._conditional_validators or (None, None)
+
+    def etag(request, *args, **kwargs):
+        return validators(request, *args, **kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return validators(request, *args, **kwargs)[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,36 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from utils.cache import get_generation
+
+
+def get_estimated_count(queryset):
+    """Number of rows the PostgreSQL planner expects the queryset to return, without running it"""
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_results(queryset, key, generations=()):
+    """
+    Return (count, approximate) for the queryset, cached under `key` until one of the `generations`
+    is bumped. Large results are not counted: the planner estimate is returned as approximate.
+    """
+    parts = [str(part) for part in key] + [f"{name}={get_generation(name)}" for name in generations]
+    cache_key = "count:" + hashlib.sha1("|".join(parts).encode()).hexdigest()
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    estimate = get_estimated_count(queryset)
+    if estimate >= settings.LIST_COUNT_ESTIMATE_THRESHOLD:
+        result = (estimate, True)
+    else:
+        result = (queryset.order_by().count(), False)
+    cache.set(cache_key, result, settings.LIST_COUNT_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,78 @@
+import logging
+
+import httpx
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+
+
+logger = logging.getLogger(__name__)
+
+
+class SurrogateKeyMixin:
+    """
+    Tag the response with the Surrogate-Key header listing get_surrogate_keys(), which marks it as
+    cacheable at the edge for anonymous visitors (see EdgeCacheMiddleware) and lets purge() evict it
+    """
+
+    def get_surrogate_keys(self):
+        return []
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        response["Surrogate-Key"] = " ".join(self.get_surrogate_keys())
+        return response
+
+
+class EdgeCacheMiddleware:
+    """
+    Make the responses tagged with surrogate keys cacheable by the edge cache (CDN, Varnish) when they
+    go to an anonymous visitor and set no cookie: public Cache-Control, and no Vary: Cookie, so that
+    cookies set by the browser (analytics) do not split the cache. The edge must not serve cached pages
+    to the requests having a session cookie. Must come before SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if "Surrogate-Key" not in response:
+            return response
+
+        if request.user.is_authenticated or response.cookies:
+            del response["Surrogate-Key"]
+            patch_cache_control(response, private=True)
+            return response
+
+        vary = [header.strip() for header in response.get("Vary", "").split(",")]
+        vary = [header for header in vary if header and header.lower() != "cookie"]
+        if vary:
+            response["Vary"] = ", ".join(vary)
+        elif "Vary" in response:
+            del response["Vary"]
+        # browsers revalidate, the edge keeps the page until it is purged or expires
+        patch_cache_control(response, public=True, max_age=0, s_maxage=settings.EDGE_CACHE_MAX_AGE)
+        return response
+
+
+def send_purge(keys):
+    """Ask the edge cache to evict the responses tagged with any of the keys"""
+    try:
+        response = httpx.request(
+            settings.EDGE_PURGE_METHOD,
+            settings.EDGE_PURGE_URL,
+            headers={settings.EDGE_PURGE_HEADER: " ".join(sorted(keys))},
+            timeout=settings.EDGE_PURGE_TIMEOUT,
+        )
+        response.raise_for_status()
+    except httpx.HTTPError as exc:
+        # the purged pages expire after EDGE_CACHE_MAX_AGE anyway
+        logger.warning("Purge of the edge cache failed (%s): %s", " ".join(sorted(keys)), exc)
+
+
+def purge(keys):
+    """Purge the surrogate keys from the edge cache once the current transaction is committed"""
+    keys = set(keys)
+    if settings.EDGE_PURGE_URL and keys:
+        transaction.on_commit(lambda: send_purge(keys))
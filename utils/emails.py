@@ -1,15 +1,140 @@
-import httpx
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from utils.brevo import BrevoError, BrevoUnavailable, get_brevo_client
+from utils.models import OutgoingEmail
+
 
+logger = logging.getLogger(__name__)
 
-def send_email(to, params, template_id):
-    headers = {"api-key": settings.BREVO_API_KEY, "Content-Type": "application/json", "Accept": "application/json"}
+
+def send_email(to, params, template_id, message_versions=None):
+    """
+    Send a Brevo template email and return the Brevo response (with its messageId).
+    With message_versions, a single call sends one personalised version per group of recipients.
+    Raise BrevoError when Brevo refuses the email or cannot be reached.
+    """
     payload = {
         "sender": {"name": "Conseil National de la Refondation", "email": settings.DEFAULT_FROM_EMAIL},
-        "to": to,
-        "params": params,
         "templateId": template_id,
     }
+    if to:
+        payload["to"] = to
+    if params:
+        payload["params"] = params
+    if message_versions:
+        payload["messageVersions"] = message_versions
+    return get_brevo_client().post(settings.BREVO_SMTP_URL, payload)
+
+
+def queue_email(to, params, template_id, dedup_key=None, message_versions=None):
+    """
+    Store an email in the outbox instead of calling Brevo during the request.
+    Must be called in the same transaction as the change it notifies, so that the email
+    is only sent if that change is committed. A second call with the same dedup_key is a no-op.
+    """
+    fields = {"to": to, "params": params, "template_id": template_id, "message_versions": message_versions}
+    if dedup_key is None:
+        return OutgoingEmail.objects.create(**fields)
+
+    email, _ = OutgoingEmail.objects.get_or_create(dedup_key=dedup_key, defaults=fields)
+    return email
+
+
+def queue_batch_email(versions, template_id, dedup_key):
+    """
+    Queue one outbox entry per BREVO_MAX_MESSAGE_VERSIONS versions (Brevo's limit per call).
+    Each version is a {"to": [...], "params": {...}} dict.
+    """
+    size = settings.BREVO_MAX_MESSAGE_VERSIONS
+    return [
+        queue_email(
+            to=[],
+            params={},
+            template_id=template_id,
+            dedup_key=f"{dedup_key}-{index}",
+            message_versions=versions[start : start + size],
+        )
+        for index, start in enumerate(range(0, len(versions), size))
+    ]
+
+
+def get_retry_delay(attempts):
+    """Exponential backoff starting at BREVO_OUTBOX_RETRY_DELAY, capped by BREVO_OUTBOX_MAX_RETRY_DELAY"""
+    return timedelta(
+        seconds=min(settings.BREVO_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), settings.BREVO_OUTBOX_MAX_RETRY_DELAY)
+    )
+
+
+def claim_queued_emails(batch_size):
+    """
+    Lock a batch of due emails and push their next attempt forward, so that concurrent workers
+    skip them while they are being sent.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.Status.PENDING, next_attempt_on__lte=now)
+            .order_by("next_attempt_on", "id")[:batch_size]
+        )
+        OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_on=now + timedelta(seconds=settings.BREVO_OUTBOX_LEASE)
+        )
+    return emails
+
+
+def deliver_email(email):
+    """Return None when the email has been sent, the BrevoError otherwise"""
+    try:
+        send_email(
+            to=email.to, params=email.params, template_id=email.template_id, message_versions=email.message_versions
+        )
+    except BrevoError as exc:
+        return exc
+    return None
+
+
+def record_delivery(email, error=None):
+    if isinstance(error, BrevoUnavailable):
+        # Brevo is known to be down: wait for the circuit breaker without using up an attempt
+        email.next_attempt_on = timezone.now() + timedelta(seconds=settings.BREVO_CIRCUIT_RESET_TIMEOUT)
+        email.last_error = str(error)
+        email.save(update_fields=["last_error", "next_attempt_on"])
+        return
+
+    email.attempts += 1
+    if error is None:
+        email.status = OutgoingEmail.Status.SENT
+        email.sent_on = timezone.now()
+        email.last_error = ""
+    else:
+        email.last_error = str(error)
+        if email.attempts >= settings.BREVO_OUTBOX_MAX_ATTEMPTS:
+            email.status = OutgoingEmail.Status.FAILED
+            logger.error("Giving up on email %s after %s attempts: %s", email.pk, email.attempts, email.last_error)
+        else:
+            email.next_attempt_on = timezone.now() + get_retry_delay(email.attempts)
+    email.save(update_fields=["attempts", "status", "sent_on", "last_error", "next_attempt_on"])
+
+
+def send_queued_emails(batch_size=50, max_workers=4):
+    """
+    Send one batch of due emails concurrently and return the number of emails processed.
+    HTTP calls run in worker threads, database writes stay in the calling thread.
+    """
+    emails = claim_queued_emails(batch_size)
+    if not emails:
+        return 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        errors = list(executor.map(deliver_email, emails))
 
-    response = httpx.post(settings.BREVO_SMTP_URL, headers=headers, json=payload)
-    return response.status_code == 200
+    for email, error in zip(emails, errors):
+        record_delivery(email, error)
+    return len(emails)
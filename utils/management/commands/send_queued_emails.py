@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.emails import send_queued_emails
+from utils.metrics import start_worker_metrics_server
+
+
+class Command(BaseCommand):
+    help = "Send the emails waiting in the outbox through Brevo"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process the due emails then exit")
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--workers", type=int, default=4, help="Number of concurrent Brevo calls")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the outbox is empty")
+
+    def handle(self, *args, **options):
+        if not options["once"]:
+            start_worker_metrics_server()
+        while True:
+            processed = send_queued_emails(batch_size=options["batch_size"], max_workers=options["workers"])
+            if processed:
+                self.stdout.write(f"{processed} email(s) traité(s)")
+            elif options["once"]:
+                return
+            else:
+                time.sleep(options["sleep"])
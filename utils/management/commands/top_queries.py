@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from utils.models import QueryFingerprint
+
+
+ORDERINGS = {
+    "total": "-total_time",
+    "max": "-max_time",
+    "calls": "-calls",
+    "average": "-average",
+}
+
+
+class Command(BaseCommand):
+    help = "Show the SQL fingerprints taking the most database time, recorded by QueryFingerprintMiddleware"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--order-by", choices=ORDERINGS, default="total")
+        parser.add_argument("--view", help="only the queries of this view (URL name)")
+        parser.add_argument("--reset", action="store_true", help="delete the recorded fingerprints")
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            deleted, _ = QueryFingerprint.objects.all().delete()
+            self.stdout.write(f"{deleted} empreinte(s) supprimée(s)")
+            return
+
+        fingerprints = QueryFingerprint.objects.annotate(average=F("total_time") / F("calls"))
+        if options["view"]:
+            fingerprints = fingerprints.filter(view=options["view"])
+        for fingerprint in fingerprints.order_by(ORDERINGS[options["order_by"]])[: options["limit"]]:
+            self.stdout.write(
+                f"{fingerprint.total_time * 1000:10.1f} ms {fingerprint.calls:8} appels "
+                f"{fingerprint.average * 1000:8.2f} ms moy. {fingerprint.max_time * 1000:8.1f} ms max  "
+                f"{fingerprint.view}\n    {fingerprint.sql}"
+            )
@@ -0,0 +1,107 @@
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_DURATION = Histogram(
+    "cnr_http_request_duration_seconds",
+    "Durée de traitement des requêtes HTTP",
+    ["view", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_DB_QUERIES = Histogram(
+    "cnr_http_request_db_queries",
+    "Nombre de requêtes SQL par requête HTTP",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_DURATION = Histogram(
+    "cnr_http_request_db_duration_seconds",
+    "Durée cumulée des requêtes SQL par requête HTTP",
+    ["view"],
+    buckets=LATENCY_BUCKETS,
+)
+BREVO_REQUEST_DURATION = Histogram(
+    "cnr_brevo_request_duration_seconds",
+    "Durée des appels à l'API Brevo",
+    ["outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+BREVO_REJECTED = Counter("cnr_brevo_rejected", "Appels à Brevo refusés par le disjoncteur")
+STORAGE_URLS = Counter("cnr_storage_urls", "URLs des fichiers du stockage, par origine", ["outcome"])
+MODEL_WRITES = Counter("cnr_model_writes", "Écritures des participations et contributions", ["model", "action"])
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """
+    Observe the duration and the queries of each request, labelled by URL name.
+    Comes right after QueryFingerprintMiddleware, so that only the flush of the fingerprints is not measured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        start = time.perf_counter()
+        with connections["default"].execute_wrapper(queries):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        # the URL name keeps the number of label values bounded, unlike the path
+        view = getattr(request.resolver_match, "url_name", None) or "unresolved"
+        REQUEST_DURATION.labels(view, request.method, response.status_code).observe(duration)
+        REQUEST_DB_QUERIES.labels(view).observe(queries.count)
+        REQUEST_DB_DURATION.labels(view).observe(queries.duration)
+        return response
+
+
+def get_registry():
+    """
+    Registry of this process or, when PROMETHEUS_MULTIPROC_DIR is set (see config/gunicorn.py),
+    aggregating the samples that every worker process writes in that directory
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def export_metrics():
+    """(body, content type) of the metrics in the Prometheus text format"""
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
+
+
+def start_worker_metrics_server():
+    """Serve the metrics of a worker process, outside gunicorn, on METRICS_WORKER_PORT when set"""
+    if settings.METRICS_WORKER_PORT:
+        start_http_server(settings.METRICS_WORKER_PORT)
@@ -0,0 +1,46 @@
+# Generated by Django 4.1.9 on 2026-10-18 11:50
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="OutgoingEmail",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("dedup_key", models.CharField(blank=True, max_length=255, null=True, unique=True)),
+                ("template_id", models.PositiveIntegerField()),
+                ("to", models.JSONField()),
+                ("params", models.JSONField(blank=True, default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "En attente"), ("sent", "Envoyé"), ("failed", "En échec")],
+                        default="pending",
+                        max_length=7,
+                        verbose_name="Statut",
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("next_attempt_on", models.DateTimeField(default=django.utils.timezone.now)),
+                ("last_error", models.TextField(blank=True, default="")),
+                ("created_on", models.DateTimeField(auto_now_add=True)),
+                ("sent_on", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Email en attente",
+                "verbose_name_plural": "Emails en attente",
+                "ordering": ["id"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="outgoingemail",
+            index=models.Index(fields=["status", "next_attempt_on"], name="utils_email_status_next_idx"),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.1.9 on 2026-10-18 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("utils", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outgoingemail",
+            name="message_versions",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="outgoingemail",
+            name="to",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.1.9 on 2026-10-18 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("utils", "0002_outgoingemail_message_versions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QueryFingerprint",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("fingerprint", models.CharField(max_length=40)),
+                ("view", models.CharField(max_length=255, verbose_name="Vue")),
+                ("sql", models.TextField(verbose_name="Requête normalisée")),
+                ("calls", models.PositiveBigIntegerField(default=0, verbose_name="Exécutions")),
+                ("total_time", models.FloatField(default=0, verbose_name="Durée totale (s)")),
+                ("max_time", models.FloatField(default=0, verbose_name="Durée maximale (s)")),
+                ("first_seen", models.DateTimeField(auto_now_add=True)),
+                ("last_seen", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Empreinte de requête SQL",
+                "verbose_name_plural": "Empreintes de requêtes SQL",
+                "ordering": ["-total_time"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="queryfingerprint",
+            constraint=models.UniqueConstraint(
+                fields=("fingerprint", "view"), name="utils_query_fingerprint_view_unique"
+            ),
+        ),
+    ]
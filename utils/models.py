@@ -0,0 +1,69 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutgoingEmail(models.Model):
+    """
+    Transactional email waiting to be sent through Brevo by the outbox worker
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "En attente"
+        SENT = "sent", "Envoyé"
+        FAILED = "failed", "En échec"
+
+    dedup_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    template_id = models.PositiveIntegerField()
+    to = models.JSONField(default=list, blank=True)
+    params = models.JSONField(default=dict, blank=True)
+    message_versions = models.JSONField(blank=True, null=True)
+    status = models.CharField(
+        max_length=7,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Statut",
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_on = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_on = models.DateTimeField(auto_now_add=True)
+    sent_on = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Email en attente"
+        verbose_name_plural = "Emails en attente"
+        ordering = ["id"]
+        indexes = [models.Index(fields=["status", "next_attempt_on"], name="utils_email_status_next_idx")]
+
+    def __str__(self):
+        return f"{self.template_id} - {self.dedup_key or self.pk} - {self.status}"
+
+
+class QueryFingerprint(models.Model):
+    """
+    Aggregated executions of a normalized SQL query by a view, recorded by utils.queries.QueryRecorder
+    """
+
+    fingerprint = models.CharField(max_length=40)
+    view = models.CharField(max_length=255, verbose_name="Vue")
+    sql = models.TextField(verbose_name="Requête normalisée")
+    calls = models.PositiveBigIntegerField(default=0, verbose_name="Exécutions")
+    total_time = models.FloatField(default=0, verbose_name="Durée totale (s)")
+    max_time = models.FloatField(default=0, verbose_name="Durée maximale (s)")
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Empreinte de requête SQL"
+        verbose_name_plural = "Empreintes de requêtes SQL"
+        ordering = ["-total_time"]
+        constraints = [
+            models.UniqueConstraint(fields=["fingerprint", "view"], name="utils_query_fingerprint_view_unique")
+        ]
+
+    def __str__(self):
+        return f"{self.view} - {self.sql[:80]}"
+
+    @property
+    def average_time(self):
+        return self.total_time / self.calls if self.calls else 0
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from utils.cache import get_generation
+
+
+# the Surrogate-Key header is set by utils.edge_cache.SurrogateKeyMixin
+CACHED_HEADERS = ("Content-Type", "Surrogate-Key")
+
+
+class AnonymousPageCacheMixin:
+    """
+    Serve the pages of anonymous visitors from the "pages" cache, keyed on the path, the
+    `page_cache_params` query parameters and the current value of the `page_cache_generations`:
+    bumping one of them (see utils.cache.bump_generation) invalidates every page depending on it.
+    The parameters of `page_cache_buckets` also key on the current time slot of the given length,
+    for the filters relative to the current time.
+    """
+
+    page_cache_params = ()
+    page_cache_generations = ()
+    page_cache_buckets = {}
+
+    def get_page_cache_key(self):
+        params = []
+        for name in sorted(self.page_cache_params):
+            values = sorted(value.strip() for value in self.request.GET.getlist(name) if value.strip())
+            if values and name in self.page_cache_buckets:
+                values.append(int(time.time() // self.page_cache_buckets[name]))
+            if values:
+                params.append([name, values])
+        generations = [get_generation(name) for name in self.page_cache_generations]
+        key = json.dumps([self.request.path, params, generations], separators=(",", ":"))
+        return f"page:{hashlib.sha1(key.encode()).hexdigest()}"
+
+    def is_page_cacheable(self, request):
+        # a pending message is only displayed to its visitor
+        return (
+            settings.PAGE_CACHE_TIMEOUT > 0
+            and request.method in ("GET", "HEAD")
+            and not request.user.is_authenticated
+            and "messages" not in request.COOKIES
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.is_page_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        page_cache = caches["pages"]
+        key = self.get_page_cache_key()
+        cached = page_cache.get(key)
+        if cached is not None:
+            content, headers = cached
+            response = HttpResponse(content, headers=headers)
+            response["X-Page-Cache"] = "hit"
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            if hasattr(response, "render"):
+                response.render()
+            headers = {header: response[header] for header in CACHED_HEADERS if header in response}
+            page_cache.set(key, (response.content, headers), timeout=settings.PAGE_CACHE_TIMEOUT)
+            response["X-Page-Cache"] = "miss"
+        return response
@@ -0,0 +1,156 @@
+import base64
+import binascii
+import datetime
+import json
+from functools import cached_property
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # keep the microseconds, that DjangoJSONEncoder truncates: the cursor must be exact
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if not (self.has_next_page and self.object_list):
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], "next")
+
+    @property
+    def previous_cursor(self):
+        if not (self.has_previous_page and self.object_list):
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], "previous")
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset on a unique ordering (e.g. ("start", "end", "id")) with opaque cursors holding
+    the ordering values of the last row seen, instead of an OFFSET: every page costs the same as the first.
+    The total count is only computed when `count` is accessed.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+
+    @cached_property
+    def count(self):
+        return self.queryset.order_by().count()
+
+    def encode_cursor(self, obj, direction):
+        values = [getattr(obj, field) for field in self.ordering]
+        data = json.dumps({"v": values, "d": direction}, cls=CursorEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            values, direction = data["v"], data["d"]
+            if direction not in ("next", "previous") or len(values) != len(self.ordering):
+                raise ValueError
+            fields = [self.queryset.model._meta.get_field(field) for field in self.ordering]
+            values = [field.to_python(value) for field, value in zip(fields, values)]
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError):
+            raise InvalidCursor("Curseur de pagination invalide")
+        return values, direction
+
+    def get_condition(self, values, direction):
+        """(a, b, c) > (x, y, z) expanded as a > x OR (a = x AND (b > y OR (b = y AND c > z)))"""
+        lookup = "gt" if direction == "next" else "lt"
+        condition = Q(**{f"{self.ordering[-1]}__{lookup}": values[-1]})
+        for field, value in zip(reversed(self.ordering[:-1]), reversed(values[:-1])):
+            condition = Q(**{f"{field}__{lookup}": value}) | (Q(**{field: value}) & condition)
+        # redundant bound on the first column, so that the index range scan starts at the cursor
+        return Q(**{f"{self.ordering[0]}__{lookup}e": values[0]}) & condition
+
+    def get_page(self, cursor=None):
+        if not cursor:
+            rows = list(self.queryset.order_by(*self.ordering)[: self.per_page + 1])
+            return KeysetPage(rows[: self.per_page], self, has_next=len(rows) > self.per_page, has_previous=False)
+
+        values, direction = self.decode_cursor(cursor)
+        queryset = self.queryset.filter(self.get_condition(values, direction))
+        if direction == "next":
+            rows = list(queryset.order_by(*self.ordering)[: self.per_page + 1])
+            return KeysetPage(rows[: self.per_page], self, has_next=len(rows) > self.per_page, has_previous=True)
+
+        rows = list(queryset.order_by(*(f"-{field}" for field in self.ordering))[: self.per_page + 1])
+        return KeysetPage(rows[: self.per_page][::-1], self, has_next=True, has_previous=len(rows) > self.per_page)
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin paginating with a KeysetPaginator on `keyset_ordering` and the `cursor` GET parameter.
+    Falls back to the page number pagination when get_keyset_ordering() returns None.
+    """
+
+    keyset_ordering = None
+    cursor_kwarg = "cursor"
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        ordering = self.get_keyset_ordering()
+        if ordering is None:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, ordering, page_size)
+        try:
+            page = paginator.get_page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor as exc:
+            raise Http404(str(exc))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_result_count(self, queryset):
+        """Return (count, approximate) for the first page of a keyset pagination"""
+        return queryset.count(), False
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        paginator = context.get("paginator")
+        context["keyset_pagination"] = isinstance(paginator, KeysetPaginator)
+        if not context["keyset_pagination"]:
+            if paginator is not None:
+                context["result_count"] = paginator.count
+        elif not self.request.GET.get(self.cursor_kwarg):
+            # the total is only counted on the first page, deep pages must not pay for it
+            context["result_count"], context["result_count_approximate"] = self.get_result_count(paginator.queryset)
+        return context
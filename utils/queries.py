@@ -0,0 +1,127 @@
+import functools
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection, connections
+from django.utils import timezone
+
+from utils.models import QueryFingerprint
+
+
+logger = logging.getLogger(__name__)
+
+NORMALIZATIONS = [
+    # savepoints are named after the thread and a counter
+    (re.compile(r'"s\d+_x\d+"'), '"s?"'),
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    # IN lists and VALUES rows of any length
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+"), "(...)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+@functools.lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    """SQL with its literals, placeholders and list lengths replaced, so that queries of the same shape match"""
+    for pattern, replacement in NORMALIZATIONS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class QueryRecorder:
+    """
+    Aggregate the executions of each query fingerprint by view in process memory,
+    and add them to the QueryFingerprint table when flushed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.last_flush = time.monotonic()
+
+    def record(self, sql, view, duration):
+        normalized = normalize_sql(sql)
+        key = (hashlib.sha1(normalized.encode()).hexdigest(), view)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.entries[key] = [normalized, 1, duration, duration]
+            else:
+                entry[1] += 1
+                entry[2] += duration
+                entry[3] = max(entry[3], duration)
+
+    def flush(self):
+        with self.lock:
+            entries, self.entries = self.entries, {}
+            self.last_flush = time.monotonic()
+        if not entries:
+            return
+
+        now = timezone.now()
+        # sorted by key, so that concurrent flushes lock the rows in the same order instead of deadlocking
+        rows = [
+            (fingerprint, view, sql, calls, total, maximum, now, now)
+            for (fingerprint, view), (sql, calls, total, maximum) in sorted(entries.items())
+        ]
+        table = QueryFingerprint._meta.db_table
+        # a single upsert adding to the counters, whatever the number of processes flushing concurrently
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (fingerprint, view, sql, calls, total_time, max_time, first_seen, last_seen)
+                VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(rows))}
+                ON CONFLICT (fingerprint, view) DO UPDATE SET
+                    calls = {table}.calls + EXCLUDED.calls,
+                    total_time = {table}.total_time + EXCLUDED.total_time,
+                    max_time = GREATEST({table}.max_time, EXCLUDED.max_time),
+                    last_seen = EXCLUDED.last_seen
+                """,
+                [value for row in rows for value in row],
+            )
+
+    def flush_if_due(self, interval):
+        if time.monotonic() - self.last_flush >= interval:
+            try:
+                self.flush()
+            except DatabaseError:
+                logger.exception("Impossible d'enregistrer les empreintes de requêtes SQL")
+
+
+recorder = QueryRecorder()
+
+
+class QueryFingerprintMiddleware:
+    """
+    Record the queries of a SQL_FINGERPRINT_SAMPLE_RATE share of the requests with their view,
+    flushed every SQL_FINGERPRINT_FLUSH_INTERVAL seconds. Comes first, so that the flush is not measured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.SQL_FINGERPRINT_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                view = getattr(request.resolver_match, "view_name", None) or "-"
+                recorder.record(sql, view, time.perf_counter() - start)
+
+        with connections["default"].execute_wrapper(record_query):
+            response = self.get_response(request)
+        recorder.flush_if_due(settings.SQL_FINGERPRINT_FLUSH_INTERVAL)
+        return response
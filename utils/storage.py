@@ -0,0 +1,81 @@
+import threading
+import time
+
+from django.conf import settings
+from django.utils.encoding import filepath_to_uri
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+from utils.metrics import STORAGE_URLS
+from utils.timing import timed
+
+
+class TimedStorageMixin:
+    """Attribute the calls to the storage backend to the "storage" phase of the request timings"""
+
+    def url(self, name, *args, **kwargs):
+        with timed("storage"):
+            return super().url(name, *args, **kwargs)
+
+    def exists(self, name):
+        with timed("storage"):
+            return super().exists(name)
+
+    def size(self, name):
+        with timed("storage"):
+            return super().size(name)
+
+    def delete(self, name):
+        with timed("storage"):
+            return super().delete(name)
+
+    def _open(self, name, mode="rb"):
+        with timed("storage"):
+            return super()._open(name, mode)
+
+    def _save(self, name, content):
+        with timed("storage"):
+            return super()._save(name, content)
+
+
+class CachedUrlStorageMixin:
+    """
+    Avoid signing the URL of a file at every render: the files under MEDIA_PUBLIC_PREFIXES get their
+    unsigned URL under MEDIA_URL, and the signed URLs of the others are kept in process memory until
+    STORAGE_URL_MIN_VALIDITY seconds before they expire. Counted by outcome in cnr_storage_urls.
+    """
+
+    max_cached_urls = 10000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.url_lock = threading.Lock()
+        self.cached_urls = {}
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        if parameters or expire or http_method:
+            return super().url(name, parameters, expire, http_method)
+
+        key = self._normalize_name(clean_name(name))
+        if key.startswith(settings.MEDIA_PUBLIC_PREFIXES):
+            STORAGE_URLS.labels("public").inc()
+            return f"{settings.MEDIA_URL}{filepath_to_uri(key)}"
+
+        now = time.monotonic()
+        with self.url_lock:
+            url, reusable_until = self.cached_urls.get(key, (None, 0))
+        if now < reusable_until:
+            STORAGE_URLS.labels("cached").inc()
+            return url
+
+        STORAGE_URLS.labels("signed").inc()
+        url = super().url(name)
+        with self.url_lock:
+            if len(self.cached_urls) >= self.max_cached_urls:
+                self.cached_urls.clear()
+            self.cached_urls[key] = (url, now + self.querystring_expire - settings.STORAGE_URL_MIN_VALIDITY)
+        return url
+
+
+class TimedS3Storage(CachedUrlStorageMixin, TimedStorageMixin, S3Boto3Storage):
+    pass
@@ -0,0 +1,37 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def render_cached(objects, template_name, name, prefetch="", cache_fragments=True):
+    """
+    Render `template_name` for each object (available as `name` in the template) and return the
+    (object, html) pairs. The fragments are cached on the object pk and get_cache_version(), and all those
+    of a page are fetched with a single multi-get. `prefetch` (comma separated lookups) is only
+    prefetched for the objects to render. With cache_fragments=False, everything is rendered.
+
+    {% render_cached page_obj "event/partials/event_card.html" "event" as cards %}
+    """
+    objects = list(objects)
+    keys = [f"fragment:{template_name}:{obj.pk}:{obj.get_cache_version()}" for obj in objects]
+    fragments = cache.get_many(keys) if cache_fragments else {}
+
+    missing = [obj for obj, key in zip(objects, keys) if key not in fragments]
+    if missing:
+        if prefetch:
+            prefetch_related_objects(missing, *prefetch.split(","))
+        rendered = {
+            key: render_to_string(template_name, {name: obj})
+            for obj, key in zip(objects, keys)
+            if key not in fragments
+        }
+        if cache_fragments:
+            cache.set_many(rendered, timeout=settings.FRAGMENT_CACHE_TIMEOUT)
+        fragments.update(rendered)
+    return [(obj, fragments[key]) for obj, key in zip(objects, keys)]
@@ -0,0 +1,20 @@
+from django import template
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def srcset(image, derivatives, width=None):
+    """
+    srcset attribute listing the derivatives of `image` ({width: storage name, "source": image name})
+    and the original at `width`. Derivatives of a previous image are ignored.
+
+    <img src="{{ event.image.url }}" srcset="{% srcset event.image event.image_derivatives event.image_width %}">
+    """
+    candidates = {}
+    if derivatives.get("source") == image.name:
+        candidates = {int(size): image.storage.url(name) for size, name in derivatives.items() if size.isdigit()}
+    if width and candidates:
+        candidates[width] = image.url
+    return ", ".join(f"{url} {size}w" for size, url in sorted(candidates.items()))
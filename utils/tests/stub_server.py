@@ -0,0 +1,69 @@
+import json
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    """
+    Local HTTP server standing in for an external service in tests.
+    Replies with the queued (status, body, headers) responses in order, then with `default`,
+    and records every request it receives.
+
+        with StubServer([(503, {}, {})]) as server:
+            httpx.post(server.url + "/smtp/email")
+    """
+
+    def __init__(self, responses=None, default=(200, {}, {})):
+        self.responses = deque(responses or [])
+        self.default = default
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def next_response(self):
+        with self.lock:
+            return self.responses.popleft() if self.responses else self.default
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_any(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with stub.lock:
+                    stub.requests.append(
+                        {
+                            "method": self.command,
+                            "path": self.path,
+                            "headers": dict(self.headers),
+                            "body": body,
+                            "client_address": self.client_address,
+                        }
+                    )
+                status, payload, headers = stub.next_response()
+                content = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = do_PURGE = handle_any
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,24 @@
+from django.test import SimpleTestCase
+
+from utils.benchmark import compare_reports, percentiles
+
+
+class BenchmarkTest(SimpleTestCase):
+    def test_percentiles(self):
+        self.assertEqual(percentiles(range(1, 102)), (51, 96, 100))
+
+    def test_compare_reports(self):
+        baseline = {
+            "views": {
+                "list": {"p50_ms": 10, "p95_ms": 20, "p99_ms": 30, "queries": 4, "peak_memory_kib": 100},
+                "removed": {"p50_ms": 1},
+            }
+        }
+        report = {
+            "views": {
+                "list": {"p50_ms": 11.9, "p95_ms": 24.1, "p99_ms": 30, "queries": 5, "peak_memory_kib": 100},
+                "added": {"p50_ms": 1000},
+            }
+        }
+        self.assertEqual(compare_reports(baseline, report), [("list", "p95_ms", 20, 24.1), ("list", "queries", 4, 5)])
+        self.assertEqual(compare_reports(baseline, report, threshold=0.5), [("list", "queries", 4, 5)])
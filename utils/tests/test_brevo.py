@@ -0,0 +1,87 @@
+from django.test import SimpleTestCase
+
+from utils.brevo import BrevoClient, BrevoError, BrevoUnavailable, CircuitBreaker
+from utils.tests.stub_server import StubServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class BrevoClientTest(SimpleTestCase):
+    def get_client(self, **kwargs):
+        kwargs.setdefault("backoff", 0.01)
+        client = BrevoClient(api_key="secret", **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_connection_is_reused(self):
+        with StubServer(default=(201, {"messageId": "<id@brevo>"}, {})) as server:
+            client = self.get_client()
+            for _ in range(3):
+                self.assertEqual(
+                    client.post(f"{server.url}/smtp/email", {"templateId": 1}), {"messageId": "<id@brevo>"}
+                )
+
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(server.requests[0]["headers"]["api-key"], "secret")
+        self.assertEqual(server.requests[0]["body"], b'{"templateId": 1}')
+        # one keep-alive connection served the 3 calls
+        self.assertEqual(len({request["client_address"] for request in server.requests}), 1)
+        self.assertEqual(client.stats.snapshot()["calls"], 3)
+        self.assertEqual(client.stats.snapshot()["errors"], 0)
+
+    def test_retry_on_server_errors(self):
+        with StubServer([(503, {}, {}), (429, {}, {"Retry-After": "0"})], default=(201, {}, {})) as server:
+            client = self.get_client(max_retries=2)
+            client.post(f"{server.url}/smtp/email", {})
+
+        self.assertEqual(len(server.requests), 3)
+        stats = client.stats.snapshot()
+        self.assertEqual(stats["calls"], 3)
+        self.assertEqual(stats["errors"], 2)
+        self.assertEqual(stats["retries"], 2)
+
+    def test_no_retry_on_client_errors(self):
+        with StubServer(default=(400, {"message": "invalid"}, {})) as server:
+            client = self.get_client(max_retries=2)
+            with self.assertRaises(BrevoError) as context:
+                client.post(f"{server.url}/smtp/email", {})
+
+        self.assertEqual(context.exception.status_code, 400)
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(client.breaker.failures, 0)
+
+    def test_timeout(self):
+        client = self.get_client(timeout=0.2, connect_timeout=0.2, max_retries=0)
+        with self.assertRaises(BrevoError):
+            # nothing listens on this port
+            client.post("http://127.0.0.1:9/smtp/email", {})
+        self.assertEqual(client.stats.snapshot()["errors"], 1)
+
+    def test_circuit_breaker(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+        with StubServer(default=(500, {}, {})) as server:
+            client = self.get_client(max_retries=0, breaker=breaker)
+            for _ in range(2):
+                with self.assertRaises(BrevoError):
+                    client.post(f"{server.url}/smtp/email", {})
+
+            # circuit is open: fail fast without calling the server
+            with self.assertRaises(BrevoUnavailable):
+                client.post(f"{server.url}/smtp/email", {})
+            self.assertEqual(len(server.requests), 2)
+            self.assertEqual(client.stats.snapshot()["rejected"], 1)
+
+            # after the reset timeout, a trial call goes through and closes the circuit
+            clock.now = 31
+            server.default = (201, {}, {})
+            client.post(f"{server.url}/smtp/email", {})
+            self.assertEqual(len(server.requests), 3)
+            client.post(f"{server.url}/smtp/email", {})
+            self.assertEqual(len(server.requests), 4)
@@ -0,0 +1,37 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from utils.cache import GenerationCache
+
+
+class GenerationCacheTest(TestCase):
+    def test_value_is_kept_until_invalidated(self):
+        load = mock.Mock(side_effect=[1, 2, 3])
+        cached = GenerationCache("test", load)
+
+        self.assertEqual(cached.get(), 1)
+        self.assertEqual(cached.get(), 1)
+        self.assertEqual(load.call_count, 1)
+
+        # another instance stands for another process
+        GenerationCache("test", load).invalidate()
+        self.assertEqual(cached.get(), 2)
+        self.assertEqual(cached.get(), 2)
+
+    def test_value_expires(self):
+        load = mock.Mock(side_effect=[1, 2])
+        cached = GenerationCache("test_expires", load, max_age=0)
+        self.assertEqual(cached.get(), 1)
+        self.assertEqual(cached.get(), 2)
+
+    def test_generations_survive_the_culling_of_the_cached_data(self):
+        load = mock.Mock(side_effect=[1, 2])
+        cached = GenerationCache("test_culled", load)
+        self.assertEqual(cached.get(), 1)
+
+        # the default cache drops entries when full
+        cache.clear()
+        self.assertEqual(cached.get(), 1)
+        self.assertEqual(load.call_count, 1)
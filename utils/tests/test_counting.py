@@ -0,0 +1,29 @@
+from django.test import TestCase, override_settings
+
+from event.factories import EventFactory
+from event.models import Event
+from utils.cache import bump_generation
+from utils.counting import count_results, get_estimated_count
+
+
+class CountResultsTest(TestCase):
+    def setUp(self):
+        EventFactory.create_batch(3, pub_status=Event.PubStatus.PUB)
+
+    def test_count_is_cached_until_generation_bump(self):
+        queryset = Event.objects.filter(pub_status=Event.PubStatus.PUB)
+        self.assertEqual(count_results(queryset, ["test", "pub"], generations=["test_events"]), (3, False))
+
+        EventFactory(pub_status=Event.PubStatus.PUB)
+        with self.assertNumQueries(0):
+            self.assertEqual(count_results(queryset, ["test", "pub"], generations=["test_events"]), (3, False))
+
+        bump_generation("test_events")
+        self.assertEqual(count_results(queryset, ["test", "pub"], generations=["test_events"]), (4, False))
+
+    @override_settings(LIST_COUNT_ESTIMATE_THRESHOLD=0)
+    def test_large_results_are_estimated(self):
+        queryset = Event.objects.all()
+        estimate = get_estimated_count(queryset)
+        with self.assertNumQueries(1):
+            self.assertEqual(count_results(queryset, ["test", "all"]), (estimate, True))
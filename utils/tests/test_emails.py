@@ -0,0 +1,104 @@
+import io
+import json
+from datetime import timedelta
+
+import httpx
+import respx
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from utils.brevo import get_brevo_client
+from utils.emails import queue_batch_email, queue_email, send_queued_emails
+from utils.models import OutgoingEmail
+
+
+TO = [{"name": "Jeanne Martin", "email": "jeanne.martin@example.com"}]
+
+
+class QueueEmailTest(TestCase):
+    def test_queue_email_is_deduplicated(self):
+        queue_email(TO, {"event_subject": "Sujet"}, 41, dedup_key="booking-1-accepted")
+        queue_email(TO, {"event_subject": "Sujet"}, 41, dedup_key="booking-1-accepted")
+        queue_email(TO, {"event_subject": "Sujet"}, 41)
+        queue_email(TO, {"event_subject": "Sujet"}, 41)
+        self.assertEqual(OutgoingEmail.objects.count(), 3)
+        self.assertEqual(OutgoingEmail.objects.filter(dedup_key="booking-1-accepted").count(), 1)
+
+
+@override_settings(BREVO_OUTBOX_MAX_ATTEMPTS=2, BREVO_OUTBOX_RETRY_DELAY=60, BREVO_MAX_RETRIES=0)
+class SendQueuedEmailsTest(TestCase):
+    def setUp(self):
+        get_brevo_client.cache_clear()
+        self.email = queue_email(TO, {"event_subject": "Sujet"}, 41, dedup_key="booking-1-accepted")
+
+    @respx.mock
+    def test_due_emails_are_sent(self):
+        route = respx.post(settings.BREVO_SMTP_URL).mock(return_value=httpx.Response(201, json={"messageId": "<1>"}))
+        call_command("send_queued_emails", "--once", stdout=io.StringIO())
+
+        self.assertEqual(route.call_count, 1)
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, OutgoingEmail.Status.SENT)
+        self.assertEqual(self.email.attempts, 1)
+        self.assertIsNotNone(self.email.sent_on)
+
+        # nothing left to send
+        self.assertEqual(send_queued_emails(), 0)
+        self.assertEqual(route.call_count, 1)
+
+    @respx.mock
+    def test_failed_emails_are_retried_with_backoff(self):
+        route = respx.post(settings.BREVO_SMTP_URL).mock(return_value=httpx.Response(500))
+        self.assertEqual(send_queued_emails(), 1)
+
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, OutgoingEmail.Status.PENDING)
+        self.assertEqual(self.email.attempts, 1)
+        self.assertGreater(self.email.next_attempt_on, timezone.now() + timedelta(seconds=50))
+
+        # not due yet
+        self.assertEqual(send_queued_emails(), 0)
+
+        OutgoingEmail.objects.update(next_attempt_on=timezone.now())
+        route.mock(side_effect=httpx.ConnectTimeout("timeout"))
+        self.assertEqual(send_queued_emails(), 1)
+
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, OutgoingEmail.Status.FAILED)
+        self.assertEqual(self.email.attempts, 2)
+        self.assertIn("ConnectTimeout", self.email.last_error)
+
+    @respx.mock
+    @override_settings(BREVO_CIRCUIT_FAILURE_THRESHOLD=1)
+    def test_open_circuit_does_not_use_attempts(self):
+        route = respx.post(settings.BREVO_SMTP_URL).mock(return_value=httpx.Response(503))
+        other_email = queue_email(TO, {"event_subject": "Sujet"}, 41, dedup_key="booking-2-accepted")
+        send_queued_emails(max_workers=1)
+
+        # the first call opened the circuit, the second email was not sent to Brevo
+        self.assertEqual(route.call_count, 1)
+        self.email.refresh_from_db()
+        other_email.refresh_from_db()
+        self.assertEqual(self.email.attempts, 1)
+        self.assertEqual(other_email.attempts, 0)
+        self.assertEqual(other_email.status, OutgoingEmail.Status.PENDING)
+        self.assertGreater(other_email.next_attempt_on, timezone.now())
+
+    @respx.mock
+    @override_settings(BREVO_MAX_MESSAGE_VERSIONS=2)
+    def test_batch_email_is_split_in_message_versions(self):
+        OutgoingEmail.objects.all().delete()
+        route = respx.post(settings.BREVO_SMTP_URL).mock(return_value=httpx.Response(201, json={"messageId": "<1>"}))
+        versions = [{"to": [{"name": f"P{i}", "email": f"p{i}@example.com"}], "params": {"i": i}} for i in range(3)]
+        queue_batch_email(versions, 41, dedup_key="event-1-accept")
+        queue_batch_email(versions, 41, dedup_key="event-1-accept")
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+
+        send_queued_emails()
+        self.assertEqual(route.call_count, 2)
+        payloads = [json.loads(call.request.content) for call in route.calls]
+        self.assertCountEqual([len(payload["messageVersions"]) for payload in payloads], [2, 1])
+        self.assertNotIn("to", payloads[0])
+        self.assertEqual(payloads[0]["templateId"], 41)
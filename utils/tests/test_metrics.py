@@ -0,0 +1,69 @@
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from event.factories import EventFactory
+from event.models import Booking, Event
+from signup.factories import EmailBasedUserFactory
+from utils.brevo import BrevoStats
+from utils.metrics import get_registry, start_worker_metrics_server
+
+
+@override_settings(METRICS_TOKEN="secret")
+class MetricsTest(TestCase):
+    def scrape(self):
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_are_observed_by_url_name(self):
+        before = self.sample("cnr_http_request_duration_seconds_count", view="event_list", method="GET", status="200")
+        self.client.get(reverse("event_list"))
+        self.assertEqual(
+            self.sample("cnr_http_request_duration_seconds_count", view="event_list", method="GET", status="200"),
+            before + 1,
+        )
+        self.assertGreater(self.sample("cnr_http_request_db_queries_sum", view="event_list"), 0)
+        self.assertIn('cnr_http_request_duration_seconds_bucket{le="0.01",method="GET"', self.scrape())
+
+    def test_writes_and_brevo_calls_are_counted(self):
+        before = self.sample("cnr_model_writes_total", model="booking", action="created")
+        Booking.objects.create(event=EventFactory(pub_status=Event.PubStatus.PUB), participant=EmailBasedUserFactory())
+        self.assertEqual(self.sample("cnr_model_writes_total", model="booking", action="created"), before + 1)
+
+        before = self.sample("cnr_brevo_request_duration_seconds_count", outcome="error")
+        BrevoStats().record_call(0.2, error=True)
+        self.assertEqual(self.sample("cnr_brevo_request_duration_seconds_count", outcome="error"), before + 1)
+
+    def test_endpoint_is_protected(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        with override_settings(METRICS_TOKEN=""):
+            self.assertEqual(self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer ").status_code, 404)
+
+    def test_multiprocess_registry(self):
+        self.assertIs(get_registry(), REGISTRY)
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory}):
+                self.assertIsNot(get_registry(), REGISTRY)
+                self.assertEqual(self.scrape(), "")
+
+    @override_settings(METRICS_WORKER_PORT=9101)
+    def test_workers_serve_their_metrics(self):
+        with mock.patch("utils.metrics.start_http_server") as start_http_server:
+            call_command("send_queued_emails", "--once", stdout=io.StringIO())
+            start_http_server.assert_not_called()
+
+            start_worker_metrics_server()
+            start_http_server.assert_called_once_with(9101)
+            with override_settings(METRICS_WORKER_PORT=0):
+                start_worker_metrics_server()
+            self.assertEqual(start_http_server.call_count, 1)
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase
+
+from event.factories import EventFactory
+from event.models import Event
+from utils.pagination import InvalidCursor, KeysetPaginator
+
+
+class KeysetPaginatorTest(TestCase):
+    def setUp(self):
+        start = datetime(2024, 1, 1, 9, tzinfo=timezone.utc)
+        # equal starts, so that the following columns of the ordering are needed
+        self.events = [
+            EventFactory(start=start + timedelta(days=index // 3), end=start + timedelta(days=index // 3, hours=2))
+            for index in range(7)
+        ]
+        self.events.sort(key=lambda event: (event.start, event.end, event.pk))
+        self.paginator = KeysetPaginator(Event.objects.all(), ("start", "end", "id"), per_page=3)
+
+    def test_walk_forward_and_backward(self):
+        page = self.paginator.get_page()
+        self.assertEqual(page.object_list, self.events[:3])
+        self.assertFalse(page.has_previous())
+        self.assertIsNone(page.previous_cursor)
+
+        page = self.paginator.get_page(page.next_cursor)
+        self.assertEqual(page.object_list, self.events[3:6])
+        page = self.paginator.get_page(page.next_cursor)
+        self.assertEqual(page.object_list, self.events[6:])
+        self.assertFalse(page.has_next())
+        self.assertIsNone(page.next_cursor)
+
+        page = self.paginator.get_page(page.previous_cursor)
+        self.assertEqual(page.object_list, self.events[3:6])
+        page = self.paginator.get_page(page.previous_cursor)
+        self.assertEqual(page.object_list, self.events[:3])
+        self.assertFalse(page.has_previous())
+
+    def test_pages_do_not_count(self):
+        page = self.paginator.get_page()
+        with self.assertNumQueries(1):
+            self.paginator.get_page(page.next_cursor)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.paginator.count, 7)
+
+    def test_invalid_cursor(self):
+        for cursor in ("nimportequoi", "eyJ2IjpbMV0sImQiOiJuZXh0In0", "eyJ2IjpbImEiLCJiIiwxXSwiZCI6Im5leHQifQ"):
+            with self.assertRaises(InvalidCursor):
+                self.paginator.get_page(cursor)
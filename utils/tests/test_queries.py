@@ -0,0 +1,74 @@
+import io
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from event.factories import ContributionFactory, ContributionStatusFactory, EventFactory
+from event.models import Event
+from utils.models import QueryFingerprint
+from utils.queries import QueryRecorder, normalize_sql, recorder
+
+
+class NormalizeSqlTest(SimpleTestCase):
+    def test_queries_of_the_same_shape_match(self):
+        self.assertEqual(
+            normalize_sql('SELECT "t"."id" FROM "t" WHERE "t"."id" IN (%s, %s, %s) AND "t"."x" = \'a\'  LIMIT 21'),
+            'SELECT "t"."id" FROM "t" WHERE "t"."id" IN (...) AND "t"."x" = ? LIMIT ?',
+        )
+        self.assertEqual(
+            normalize_sql('INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s)'),
+            normalize_sql('INSERT INTO "t" ("a", "b") VALUES (%s, %s)'),
+        )
+        self.assertEqual(normalize_sql('SAVEPOINT "s1404_x12"'), normalize_sql('SAVEPOINT "s99_x1"'))
+        # identifiers are kept
+        self.assertEqual(normalize_sql('SELECT "T3"."id" FROM "t1"'), 'SELECT "T3"."id" FROM "t1"')
+
+
+class QueryRecorderTest(TestCase):
+    def test_flush_adds_to_the_stored_fingerprints(self):
+        query_recorder = QueryRecorder()
+        for duration in (0.1, 0.3):
+            query_recorder.record('SELECT * FROM "t" WHERE "id" = %s', "event_list", duration)
+        query_recorder.flush()
+        query_recorder.record('SELECT * FROM "t" WHERE "id" = %s', "event_list", 0.2)
+        query_recorder.record('SELECT * FROM "t" WHERE "id" = %s', "event_detail", 0.2)
+        query_recorder.flush()
+
+        fingerprint = QueryFingerprint.objects.get(view="event_list")
+        self.assertEqual(fingerprint.sql, 'SELECT * FROM "t" WHERE "id" = ?')
+        self.assertEqual(fingerprint.calls, 3)
+        self.assertAlmostEqual(fingerprint.total_time, 0.6)
+        self.assertAlmostEqual(fingerprint.max_time, 0.3)
+        self.assertEqual(QueryFingerprint.objects.count(), 2)
+
+    def test_flush_upserts_the_rows_in_key_order(self):
+        query_recorder = QueryRecorder()
+        for view in ("view_c", "view_a", "view_b"):
+            query_recorder.record("SELECT 1", view, 0.1)
+        with CaptureQueriesContext(connection) as queries:
+            query_recorder.flush()
+        sql = queries[0]["sql"]
+        self.assertLess(sql.index("view_a"), sql.index("view_b"))
+        self.assertLess(sql.index("view_b"), sql.index("view_c"))
+
+    @override_settings(SQL_FINGERPRINT_SAMPLE_RATE=1, SQL_FINGERPRINT_FLUSH_INTERVAL=0)
+    def test_middleware_records_the_queries_by_view(self):
+        event = EventFactory(pub_status=Event.PubStatus.PUB)
+        for _ in range(3):
+            ContributionStatusFactory(contribution=ContributionFactory(event=event))
+
+        self.client.get(reverse("event_detail", args=[event.pk]))
+        self.assertTrue(QueryFingerprint.objects.filter(view="event_detail", sql__contains="event_event").exists())
+
+        stdout = io.StringIO()
+        call_command("top_queries", "--view", "event_detail", "--limit", "1", stdout=stdout)
+        self.assertIn("event_detail", stdout.getvalue())
+
+        call_command("top_queries", "--reset", stdout=io.StringIO())
+        self.assertFalse(QueryFingerprint.objects.exists())
+
+    def tearDown(self):
+        recorder.entries.clear()
@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from prometheus_client import REGISTRY
+
+from utils.storage import TimedS3Storage
+
+
+class CachedUrlStorageTest(SimpleTestCase):
+    def setUp(self):
+        self.storage = TimedS3Storage()
+
+    def sample(self, outcome):
+        return REGISTRY.get_sample_value("cnr_storage_urls_total", {"outcome": outcome}) or 0
+
+    def test_media_url_has_a_single_scheme(self):
+        self.assertRegex(settings.MEDIA_URL, r"^https?://[^/]+/.+/$")
+        self.assertNotIn("://", settings.MEDIA_URL.split("://", 1)[1])
+
+    def test_signed_urls_are_reused_until_shortly_before_expiry(self):
+        signed, cached = self.sample("signed"), self.sample("cached")
+        lifetime = self.storage.querystring_expire - settings.STORAGE_URL_MIN_VALIDITY
+        with mock.patch("utils.storage.time.monotonic", return_value=1000):
+            url = self.storage.url("images/photo.jpg")
+            self.assertIn("Signature", url)
+            self.assertEqual([self.storage.url("images/photo.jpg") for _ in range(9)], [url] * 9)
+        self.assertEqual(self.sample("signed"), signed + 1)
+        self.assertEqual(self.sample("cached"), cached + 9)
+
+        with mock.patch("utils.storage.time.monotonic", return_value=1000 + lifetime):
+            self.storage.url("images/photo.jpg")
+        self.assertEqual(self.sample("signed"), signed + 2)
+
+        # URLs with other parameters are not shared
+        self.assertNotEqual(self.storage.url("images/photo.jpg", expire=60), url)
+
+    @override_settings(MEDIA_PUBLIC_PREFIXES=("images/",), MEDIA_URL="https://s3.example.com/bucket/")
+    def test_public_media_urls_are_not_signed(self):
+        public = self.sample("public")
+        self.assertEqual(
+            self.storage.url("images/une photo.jpg"), "https://s3.example.com/bucket/images/une%20photo.jpg"
+        )
+        self.assertEqual(self.sample("public"), public + 1)
+        self.assertIn("Signature", self.storage.url("exports/event.zip"))
@@ -0,0 +1,87 @@
+import json
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from event.factories import EventFactory
+from event.models import Event
+from signup.factories import EmailBasedUserFactory
+from utils.storage import TimedStorageMixin
+from utils.timing import RequestTimings, ServerTimingMiddleware, _current_timings, timed
+
+
+class TimedFileSystemStorage(TimedStorageMixin, FileSystemStorage):
+    pass
+
+
+class RequestTimingsTest(SimpleTestCase):
+    def test_nested_phases_are_exclusive(self):
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        try:
+            with timed("template"):
+                with timed("db"):
+                    pass
+                with timed("db"):
+                    pass
+        finally:
+            _current_timings.reset(token)
+
+        summary = timings.summary()
+        self.assertEqual(summary["db"][1], 2)
+        self.assertEqual(summary["template"][1], 1)
+        self.assertAlmostEqual(
+            sum(duration for phase, (duration, _) in summary.items() if phase != "total"), summary["total"][0]
+        )
+
+    def test_not_sampled(self):
+        with timed("db"):
+            self.assertIsNone(_current_timings.get())
+
+    def test_storage_calls_are_timed(self):
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                storage = TimedFileSystemStorage(location=directory, base_url="/media/")
+                name = storage.save("image.txt", ContentFile(b"image"))
+                storage.url(name)
+        finally:
+            _current_timings.reset(token)
+        self.assertEqual(timings.counts["storage"], 3)
+
+
+class ServerTimingMiddlewareTest(TestCase):
+    def setUp(self):
+        EventFactory(pub_status=Event.PubStatus.PUB)
+
+    def test_staff_users_get_server_timing(self):
+        self.client.force_login(EmailBasedUserFactory(is_staff=True))
+        with self.assertLogs("utils.timing") as logs:
+            response = self.client.get(reverse("event_list"))
+
+        phases = {metric.split(";")[0] for metric in response["Server-Timing"].split(", ")}
+        self.assertEqual(phases, {"db", "template", "storage", "brevo", "app", "total"})
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["view"], "event_list")
+        self.assertGreater(line["db_calls"], 0)
+        self.assertGreater(line["template_calls"], 0)
+
+    def test_other_users_are_not_timed(self):
+        with self.assertNoLogs("utils.timing"):
+            response = self.client.get(reverse("event_list"))
+        self.assertNotIn("Server-Timing", response)
+
+    def test_anonymous_requests_do_not_load_the_user(self):
+        request = RequestFactory().get("/")
+        # without a session cookie, request.user (not even set here) is left alone
+        self.assertFalse(ServerTimingMiddleware(lambda request: None).is_sampled(request))
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_sampled_requests_are_logged_without_header(self):
+        with self.assertLogs("utils.timing"):
+            response = self.client.get(reverse("event_list"))
+        self.assertNotIn("Server-Timing", response)
@@ -0,0 +1,150 @@
+import contextvars
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+
+logger = logging.getLogger(__name__)
+
+# timings of the request handled by the current thread, None when it is not sampled
+_current_timings = contextvars.ContextVar("request_timings", default=None)
+
+PHASES = ("db", "template", "storage", "brevo")
+
+
+class RequestTimings:
+    """
+    Wall time of a request by phase. Nested phases are exclusive: the queries run while
+    rendering a template count for "db", not for "template".
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.stack = []
+
+    def enter(self, phase):
+        now = time.perf_counter()
+        if self.stack:
+            outer_phase, outer_start = self.stack[-1]
+            self.durations[outer_phase] += now - outer_start
+        self.stack.append((phase, now))
+        self.counts[phase] += 1
+
+    def exit(self):
+        now = time.perf_counter()
+        phase, start = self.stack.pop()
+        self.durations[phase] += now - start
+        if self.stack:
+            self.stack[-1] = (self.stack[-1][0], now)
+
+    def summary(self):
+        """{phase: (milliseconds, calls)} with "app" for the time spent out of the other phases"""
+        total = time.perf_counter() - self.started
+        summary = {phase: (self.durations[phase] * 1000, self.counts[phase]) for phase in PHASES}
+        summary["app"] = ((total - sum(self.durations.values())) * 1000, 1)
+        summary["total"] = (total * 1000, 1)
+        return summary
+
+
+@contextmanager
+def timed(phase):
+    """Attribute the time spent in the block to `phase` of the current request, if it is sampled"""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    timings.enter(phase)
+    try:
+        yield
+    finally:
+        timings.exit()
+
+
+def _time_query(execute, sql, params, many, context):
+    with timed("db"):
+        return execute(sql, params, many, context)
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        with timed("template"):
+            return self._template.render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend timing each render in the "template" phase"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class ServerTimingMiddleware:
+    """
+    Time the phases of a sampled request: every request of a staff user, and a SERVER_TIMING_SAMPLE_RATE
+    share of the others. Staff users get the timings in a Server-Timing header, and every sampled request
+    is logged as a JSON line. Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def is_staff(self, request):
+        # without a session cookie there is no staff user: loading the user would still mark the session as
+        # accessed, adding "Vary: Cookie" to every anonymous page, which the page and edge caches then skip
+        return settings.SESSION_COOKIE_NAME in request.COOKIES and request.user.is_staff
+
+    def is_sampled(self, request):
+        rate = settings.SERVER_TIMING_SAMPLE_RATE
+        return (rate > 0 and random.random() < rate) or self.is_staff(request)
+
+    def __call__(self, request):
+        if not self.is_sampled(request):
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_time_query))
+                response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+
+        summary = timings.summary()
+        if self.is_staff(request):
+            response["Server-Timing"] = ", ".join(
+                f'{phase};dur={duration:.1f};desc="{count}"' if phase in PHASES else f"{phase};dur={duration:.1f}"
+                for phase, (duration, count) in summary.items()
+            )
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "view": getattr(request.resolver_match, "view_name", None),
+                    "status": response.status_code,
+                    **{f"{phase}_ms": round(duration, 1) for phase, (duration, _) in summary.items()},
+                    **{f"{phase}_calls": summary[phase][1] for phase in PHASES},
+                }
+            )
+        )
+        return response
@@ -0,0 +1,16 @@
+import secrets
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+from utils.metrics import export_metrics
+
+
+def metrics(request):
+    """Prometheus scrape endpoint, disabled unless METRICS_TOKEN is set, then protected by that bearer token"""
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    if not secrets.compare_digest(request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"):
+        return HttpResponseForbidden()
+    body, content_type = export_metrics()
+    return HttpResponse(body, content_type=content_type)